@@ -0,0 +1,50 @@
+"""Benchmark streaming action log throughput and memory use"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from action_log import ActionLogWriter, read_action_log
+
+def write_actions(path, count):
+    """Record count synthetic scroll actions to path"""
+    with ActionLogWriter(path) as writer:
+        for i in range(count):
+            writer.write({
+                'timestamp': datetime.now().isoformat(),
+                'type': 'scroll',
+                'params': {'direction': 'down', 'amount': i % 1000}
+            })
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming action log')
+    parser.add_argument('--actions', type=int, default=1000000, help='Actions to record')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        print(f"{'format':<10} {'write act/s':>12} {'read act/s':>12} {'peak MB':>8} {'file MB':>8}")
+        for extension in ['jsonl', 'jsonl.gz']:
+            path = os.path.join(log_dir, f'actions.{extension}')
+            start = time.perf_counter()
+            write_actions(path, args.actions)
+            write_rate = args.actions / (time.perf_counter() - start)
+
+            # Separate traced run, tracemalloc slows writing down considerably
+            tracemalloc.start()
+            write_actions(path + '.traced', args.actions)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            count = sum(1 for _ in read_action_log(path))
+            read_rate = count / (time.perf_counter() - start)
+            print(f"{extension:<10} {write_rate:>12,.0f} {read_rate:>12,.0f} "
+                  f"{peak / 1e6:>8.2f} {os.path.getsize(path) / 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Memory per recorded action: lists of action dicts vs the columnar ActionBuffer"""
+import argparse
+import os
+import random
+import sys
+import gc
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from action_sequence import ActionBuffer
+from synthetic import ACTION_TYPES, synthetic_action
+
+def iter_actions(count, seed=0):
+    """Yield count synthetic actions with rising timestamps without holding them"""
+    rng = random.Random(seed)
+    timestamp = datetime(2024, 1, 1)
+    for _ in range(count):
+        timestamp += timedelta(milliseconds=rng.randint(10, 5000))
+        yield synthetic_action(rng, rng.choice(ACTION_TYPES), timestamp)
+
+def resident_bytes():
+    """Current resident set size of this process (Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def measured_bytes(build):
+    """Return (object, resident bytes gained by build(), seconds)"""
+    gc.collect()
+    before = resident_bytes()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    return result, resident_bytes() - before, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark action container memory')
+    parser.add_argument('--actions', type=int, default=10000000, help='Actions stored in the ActionBuffer')
+    parser.add_argument('--dict-actions', type=int, default=1000000,
+                        help='Actions held as dicts; extrapolated to --actions to fit in memory')
+    args = parser.parse_args()
+
+    def fill():
+        buffer = ActionBuffer()
+        buffer.extend(iter_actions(args.actions))
+        return buffer
+
+    # The buffer is built first so the dict list cannot reuse memory freed by it
+    buffer, buffer_bytes, buffer_seconds = measured_bytes(fill)
+    actions, dict_bytes, dict_seconds = measured_bytes(lambda: list(iter_actions(args.dict_actions)))
+    per_dict = dict_bytes / args.dict_actions
+    del actions
+    per_row = buffer_bytes / args.actions
+    columns_per_row = buffer.nbytes() / args.actions
+    extras = len(buffer.extra_params) + len(buffer.extra_types) + len(buffer.extra_timestamps)
+
+    print(f"{'container':<14} {'actions':>11} {'bytes/action':>13} {'total MB':>10}")
+    print(f"{'dict list':<14} {args.dict_actions:>11,} {per_dict:>13.1f} {dict_bytes / 1e6:>10.1f}")
+    print(f"{'dict list est':<14} {args.actions:>11,} {per_dict:>13.1f} {per_dict * args.actions / 1e6:>10.1f}")
+    print(f"{'ActionBuffer':<14} {args.actions:>11,} {per_row:>13.1f} {buffer_bytes / 1e6:>10.1f}")
+    print(f"columns {columns_per_row:.1f} bytes/action (allocated capacity); rows with extras: {extras:,}")
+    print(f"reduction: {per_dict / per_row:.1f}x; "
+          f"build time dicts {dict_seconds / args.dict_actions * 1e6:.2f} us/action, "
+          f"buffer {buffer_seconds / args.actions * 1e6:.2f} us/action")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Benchmark WebAgentPool throughput against a local static-file HTTP server"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent_pool import WebAgentPool
+from fixtures import serve_directory, write_fixtures
+from synthetic import save_synthetic_model
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled multi-URL prediction')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help='Pool sizes to compare')
+    parser.add_argument('--pages', type=int, default=64, help='URLs scored per pool size')
+    parser.add_argument('--ads', type=int, default=100, help='Ad slots per page')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture_dir = os.path.join(work_dir, 'fixtures')
+        write_fixtures(fixture_dir, [args.ads])
+        # Pooled agents load this, so every URL ends in a prediction rather than an unfitted-model error
+        model_path = save_synthetic_model(os.path.join(work_dir, 'model'))
+        server, base_url = serve_directory(fixture_dir)
+        # Distinct query strings so every request is a separate page load
+        urls = [f'{base_url}/ads_{args.ads}.html?page={i}' for i in range(args.pages)]
+        try:
+            print(f"{'workers':>8} {'pages/s':>10} {'scaling':>8}")
+            baseline = None
+            for size in sorted(set(args.sizes)):
+                with WebAgentPool(size=size, model_path=model_path) as pool:
+                    start = time.perf_counter()
+                    for result in pool.predict_urls(urls):
+                        assert result['error'] is None, f"{result['url']}: {result['error']}"
+                    rate = args.pages / (time.perf_counter() - start)
+                baseline = baseline or rate
+                print(f"{size:>8} {rate:>10.2f} {rate / baseline:>7.2f}x")
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
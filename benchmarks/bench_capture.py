@@ -0,0 +1,49 @@
+"""Benchmark screenshot capture modes in frames per second"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent import WebAgent
+from fixtures import write_fixtures
+
+def frames_per_second(capture, frames):
+    """Frames per second of a zero-argument capture callable"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        capture()
+    return frames / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark WebAgent screenshot capture')
+    parser.add_argument('--frames', type=int, default=30, help='Frames per capture mode')
+    parser.add_argument('--ads', type=int, default=100, help='Ad slots on the fixture page')
+    args = parser.parse_args()
+
+    clip = {'x': 0, 'y': 0, 'width': 300, 'height': 250}
+    modes = {
+        'capture_screenshot (PNG + PIL)': lambda agent: agent.capture_screenshot(),
+        'capture_frame png': lambda agent: agent.capture_frame(use_cache=False),
+        'capture_frame jpeg': lambda agent: agent.capture_frame(image_format='jpeg', use_cache=False),
+        'capture_frame webp': lambda agent: agent.capture_frame(image_format='webp', use_cache=False),
+        'capture_frame png clip 300x250': lambda agent: agent.capture_frame(clip=clip, use_cache=False),
+        'capture_frame png cached': lambda agent: agent.capture_frame(use_cache=True),
+    }
+
+    agent = WebAgent()
+    try:
+        agent.initialize(chrome_options={'headless': True})
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            path = write_fixtures(fixture_dir, [args.ads])[args.ads]
+            agent.navigate_to(f'file://{path}')
+            print(f"{'mode':<34} {'fps':>8}")
+            for name, capture in modes.items():
+                print(f"{name:<34} {frames_per_second(lambda: capture(agent), args.frames):>8.1f}")
+    finally:
+        agent.close()
+
+if __name__ == "__main__":
+    main()
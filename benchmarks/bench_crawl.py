@@ -0,0 +1,62 @@
+"""Benchmark crawl mode against several local stand-in hosts, including a resume"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent_pool import WebAgentPool
+from crawl import CrawlScheduler
+from fixtures import serve_directory, write_fixtures
+from synthetic import save_synthetic_model
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CrawlScheduler URLs per minute')
+    parser.add_argument('--hosts', type=int, default=4, help='Stand-in servers, one domain each')
+    parser.add_argument('--pages', type=int, default=25, help='URLs per host')
+    parser.add_argument('--ads', type=int, default=100, help='Ad slots per page')
+    parser.add_argument('--workers', type=int, default=4, help='Pooled browsers')
+    parser.add_argument('--per-domain', type=int, nargs='+', default=[1, 2, 4],
+                        help='Per-domain concurrency limits to compare')
+    parser.add_argument('--domain-delay', type=float, default=0.1, help='Seconds between starts per domain')
+    parser.add_argument('--latency', type=float, default=0.05, help='Added seconds per request')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture_dir = os.path.join(work_dir, 'fixtures')
+        write_fixtures(fixture_dir, [args.ads])
+        # Pooled agents load this, so crawled URLs end in predictions rather than unfitted-model errors
+        model_path = save_synthetic_model(os.path.join(work_dir, 'model'))
+        # Each server listens on its own port, so each is a separate domain to the scheduler
+        servers = [serve_directory(fixture_dir, latency=args.latency) for _ in range(args.hosts)]
+        urls = [f'{base_url}/ads_{args.ads}.html?page={i}'
+                for i in range(args.pages) for _, base_url in servers]
+        try:
+            with WebAgentPool(size=args.workers, model_path=model_path) as pool:
+                print(f"{'per-domain':>10} {'done':>6} {'failed':>7} {'seconds':>9} {'done/min':>10}")
+                for per_domain in args.per_domain:
+                    results = os.path.join(work_dir, f'results_{per_domain}.jsonl')
+                    queue_file = results + '.queue'
+                    scheduler = CrawlScheduler(pool, per_domain=per_domain, domain_delay=args.domain_delay)
+                    summary = scheduler.run(urls, queue_file, results)
+                    print(f"{per_domain:>10} {summary['done']:>6} {summary['failed']:>7} "
+                          f"{summary['seconds']:>9.2f} {summary['urls_per_minute']:>10.1f}")
+
+                # Cut the last checkpoint in half as if the crawl had crashed, then resume
+                with open(queue_file) as f:
+                    lines = f.readlines()
+                with open(queue_file, 'w') as f:
+                    f.writelines(lines[:len(lines) // 2])
+                start = time.perf_counter()
+                summary = CrawlScheduler(pool, per_domain=args.per_domain[-1],
+                                         domain_delay=args.domain_delay).run(urls, queue_file, results)
+                print(f"resume: skipped {summary['skipped']}, crawled {summary['done']} "
+                      f"({summary['failed']} failed) in {time.perf_counter() - start:.2f}s")
+        finally:
+            for server, _ in servers:
+                server.shutdown()
+
+if __name__ == "__main__":
+    main()
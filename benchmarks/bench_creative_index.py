@@ -0,0 +1,94 @@
+"""Benchmark CreativeIndex lookup speed and near-duplicate hit rate on synthetic creatives"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import cv2
+import numpy as np
+from creative_index import BKTree, CreativeIndex, hamming
+
+def base_creative(rng, width=300, height=250):
+    """Smooth random layout plus a few shapes, standing in for a banner creative"""
+    coarse = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    image = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+    for _ in range(4):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        x, y = int(rng.integers(0, width - 60)), int(rng.integers(0, height - 40))
+        cv2.rectangle(image, (x, y), (x + int(rng.integers(20, 60)), y + int(rng.integers(15, 40))), color, -1)
+    return image
+
+def near_duplicate(rng, image):
+    """Rescaled, recompressed, re-brightened and slightly cropped copy of a creative"""
+    height, width = image.shape[:2]
+    crop = int(rng.integers(0, max(2, width // 40)))
+    variant = image[crop:height - crop, crop:width - crop]
+    scale = rng.uniform(0.8, 1.25)
+    variant = cv2.resize(variant, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_LINEAR)
+    variant = cv2.convertScaleAbs(variant, alpha=1.0, beta=float(rng.uniform(-12, 12)))
+    _, encoded = cv2.imencode('.jpg', variant, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(50, 90))])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+def hit_rates(args, hash_function):
+    """Share of near-duplicates found, and of unseen creatives wrongly matched"""
+    rng = np.random.default_rng(args.seed)
+    index = CreativeIndex(max_distance=args.max_distance, hash_function=hash_function)
+    creatives = [base_creative(rng) for _ in range(args.creatives)]
+    for i, creative in enumerate(creatives):
+        index.add(index.hash_image(creative), {'score': i / args.creatives})
+
+    true_hits = 0
+    for i in range(args.variants):
+        source = int(rng.integers(0, args.creatives))
+        result, _ = index.lookup(index.hash_image(near_duplicate(rng, creatives[source])))
+        true_hits += result is not None and result['score'] == source / args.creatives
+    false_hits = sum(index.lookup(index.hash_image(base_creative(rng)))[0] is not None
+                     for _ in range(args.variants))
+    return true_hits / args.variants, false_hits / args.variants
+
+def lookup_speed(size, radius, queries=1000, seed=0):
+    """Mean microseconds per radius query: BK-tree vs linear scan over size random hashes"""
+    rng = random.Random(seed)
+    hashes = [rng.getrandbits(64) for _ in range(size)]
+    tree = BKTree()
+    for value in hashes:
+        tree.add(value)
+    # Queries near indexed hashes, as near-duplicate creatives are
+    probes = [hashes[rng.randrange(size)] ^ (1 << rng.randrange(64)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    for probe in probes:
+        tree.search(probe, radius)
+    tree_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    for probe in probes:
+        [value for value in hashes if hamming(probe, value) <= radius]
+    linear_us = (time.perf_counter() - start) / queries * 1e6
+    return tree_us, linear_us
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the perceptual-hash creative index')
+    parser.add_argument('--creatives', type=int, default=1000, help='Distinct creatives indexed for hit rates')
+    parser.add_argument('--variants', type=int, default=2000, help='Near-duplicate and unseen queries')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Index sizes for lookup timing')
+    parser.add_argument('--max-distance', type=int, default=6, help='Hamming radius counted as a hit')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'hash':>6} {'duplicate hit rate':>19} {'false hit rate':>15}")
+    for hash_function in ('dhash', 'phash'):
+        hits, false_hits = hit_rates(args, hash_function)
+        print(f"{hash_function:>6} {hits:>19.1%} {false_hits:>15.2%}")
+
+    print(f"\n{'hashes':>8} {'BK-tree (us)':>13} {'linear (us)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        tree_us, linear_us = lookup_speed(size, args.max_distance, seed=args.seed)
+        print(f"{size:>8} {tree_us:>13.1f} {linear_us:>12.1f} {linear_us / tree_us:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
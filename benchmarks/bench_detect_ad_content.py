@@ -0,0 +1,42 @@
+"""Benchmark per-element vs single-pass ad detection on local fixture pages"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent import WebAgent
+from fixtures import write_fixtures
+
+def time_detection(agent, single_pass, repeats):
+    """Return mean seconds per detect_ad_content call"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        agent.detect_ad_content(single_pass=single_pass)
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detect_ad_content')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Ad slots per fixture page')
+    parser.add_argument('--repeats', type=int, default=5, help='Detections per page and mode')
+    args = parser.parse_args()
+
+    agent = WebAgent()
+    try:
+        agent.initialize(chrome_options={'headless': True})
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            paths = write_fixtures(fixture_dir, args.counts)
+            print(f"{'ads':>6} {'per-element (s)':>16} {'single-pass (s)':>16} {'speedup':>8}")
+            for count, path in paths.items():
+                agent.navigate_to(f'file://{path}')
+                legacy = time_detection(agent, False, args.repeats)
+                batched = time_detection(agent, True, args.repeats)
+                print(f"{count:>6} {legacy:>16.4f} {batched:>16.4f} {legacy / batched:>7.1f}x")
+    finally:
+        agent.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark per-sequence vs batched feature extraction on synthetic sequences"""
+import argparse
+import os
+import sys
+import time
+
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import synthetic_sequences
+
+def original_extract_features(model, action_data):
+    """The previous extractor, which re-parsed both timestamps for every action"""
+    features = {name: 0 for name in model.feature_names}
+    for action in action_data:
+        if action['type'] == 'scroll':
+            features['scroll_distance'] += abs(action['params'].get('amount', 0))
+        elif action['type'] == 'click':
+            features['click_count'] += 1
+        if len(action_data) > 1:
+            start_time = datetime.fromisoformat(action_data[0]['timestamp'])
+            end_time = datetime.fromisoformat(action_data[-1]['timestamp'])
+            features['time_spent'] = (end_time - start_time).total_seconds()
+    return np.array([list(features.values())])
+
+def timed(func):
+    """Return (result, seconds) for a zero-argument callable"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AdRatingModel feature extraction')
+    parser.add_argument('--sequences', type=int, default=100000, help='Number of synthetic sequences')
+    parser.add_argument('--max-length', type=int, default=20, help='Maximum actions per sequence')
+    args = parser.parse_args()
+
+    sequences = synthetic_sequences(args.sequences, max_length=args.max_length)
+    model = AdRatingModel()
+
+    _, original_seconds = timed(
+        lambda: np.vstack([original_extract_features(model, sequence) for sequence in sequences]))
+    per_sequence, loop_seconds = timed(
+        lambda: np.vstack([model.extract_features(sequence) for sequence in sequences]))
+    batched, batch_seconds = timed(lambda: model.extract_features_batch(sequences))
+
+    print(f"sequences: {args.sequences}")
+    for name, seconds in [('original extract_features loop', original_seconds),
+                          ('extract_features loop', loop_seconds),
+                          ('extract_features_batch', batch_seconds)]:
+        print(f"{name:<32} {seconds:>8.3f}s {args.sequences / seconds:>12,.0f} seq/s "
+              f"{original_seconds / seconds:>6.1f}x")
+    print(f"max abs difference (loop vs batch): {np.abs(per_sequence - batched).max():.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark page processing time of the default and scoring launch profiles"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent import WebAgent
+from fixtures import serve_directory, write_fixtures
+
+def measure_profile(chrome_options, urls):
+    """Return per-page navigate + detect times in ms and the ads found on the last page"""
+    agent = WebAgent()
+    agent.initialize(chrome_options=chrome_options)
+    try:
+        # Warm up the browser process and HTTP connections
+        agent.navigate_to(urls[0])
+        agent.detect_ad_content()
+
+        samples = []
+        for url in urls[1:]:
+            start = time.perf_counter()
+            agent.navigate_to(url)
+            ad_data = agent.detect_ad_content()
+            samples.append((time.perf_counter() - start) * 1000)
+        return np.asarray(samples), ad_data['count'] if ad_data else 0
+    finally:
+        agent.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scoring launch profile')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000], help='Ad slots per page')
+    parser.add_argument('--pages', type=int, default=20, help='Pages loaded per profile and size')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='Seconds of simulated network latency per request')
+    parser.add_argument('--headed', action='store_true',
+                        help='Run the default profile with a visible window, as WebAgent does by default')
+    args = parser.parse_args()
+
+    profiles = {
+        'default': {'headless': not args.headed, 'remote_debugging_port': 0},
+        'scoring': {'launch_profile': 'scoring', 'remote_debugging_port': 0}
+    }
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        write_fixtures(fixture_dir, args.counts, assets=True)
+        server, base_url = serve_directory(fixture_dir, latency=args.latency)
+        try:
+            print(f"{'ads':>6} {'profile':>8} {'p50 ms':>9} {'p95 ms':>9} {'pages/s':>9} {'found':>6}")
+            for count in args.counts:
+                # Distinct query strings so every request is a separate page load
+                urls = [f'{base_url}/ads_{count}.html?page={i}' for i in range(args.pages + 1)]
+                for name, chrome_options in profiles.items():
+                    samples, found = measure_profile(chrome_options, urls)
+                    print(f"{count:>6} {name:>8} {np.percentile(samples, 50):>9.1f} "
+                          f"{np.percentile(samples, 95):>9.1f} {1000 / samples.mean():>9.2f} {found:>6}")
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
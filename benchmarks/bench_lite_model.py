@@ -0,0 +1,78 @@
+"""Benchmark Keras vs quantized TFLite serving: RSS, load time and prediction parity"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+from ml_model import AdRatingModel
+from synthetic import fit_synthetic_model, synthetic_sequences
+
+# Runs in a fresh interpreter so RSS and load time include every import
+SERVE_SNIPPET = """
+import json, resource, sys, time
+import numpy as np
+start = time.perf_counter()
+from ml_model import AdRatingModel
+model = AdRatingModel()
+assert model.load(sys.argv[1], lite=sys.argv[2] == 'lite')
+features = np.load(sys.argv[3])
+model.forward(features[:1])
+load_seconds = time.perf_counter() - start
+start = time.perf_counter()
+scores = model.forward(features)
+predict_seconds = time.perf_counter() - start
+np.save(sys.argv[4], scores)
+print(json.dumps({'load': load_seconds, 'predict': predict_seconds,
+                  'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  'tensorflow': 'tensorflow' in sys.modules}))
+"""
+
+def serve(model_dir, mode, features_path, scores_path):
+    """Load and score in a subprocess, returning its measurements"""
+    result = subprocess.run([sys.executable, '-c', SERVE_SNIPPET, model_dir, mode, features_path, scores_path],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TFLite export of AdRatingModel')
+    parser.add_argument('--train-sequences', type=int, default=2000, help='Sequences used to fit the model')
+    parser.add_argument('--rows', type=int, default=10000, help='Feature rows scored for parity')
+    args = parser.parse_args()
+
+    model = AdRatingModel()
+    fit_synthetic_model(model, args.train_sequences)
+    features = model.extract_features_batch(synthetic_sequences(args.rows, seed=1))
+    reference = model.forward(features)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        features_path = os.path.join(work_dir, 'features.npy')
+        np.save(features_path, features)
+        runs = [('keras', 'float16', 'keras')]
+        runs += [(f'tflite {quantization}', quantization, 'lite') for quantization in ('float16', 'int8')]
+
+        print(f"{'serving':<15} {'artifact KB':>12} {'load (s)':>9} {'RSS (MB)':>9} "
+              f"{'rows/s':>10} {'max abs diff':>13} {'TF imported':>12}")
+        for name, quantization, mode in runs:
+            model_dir = os.path.join(work_dir, quantization)
+            if not os.path.exists(model_dir):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    model.save(model_dir, export_lite=True, lite_quantization=quantization)
+            scores_path = os.path.join(work_dir, f'scores_{mode}_{quantization}.npy')
+            stats = serve(model_dir, mode, features_path, scores_path)
+            size = os.path.getsize(os.path.join(model_dir, 'ad_rating_model.tflite')) / 1024
+            difference = np.abs(np.load(scores_path) - reference).max()
+            print(f"{name:<15} {size if mode == 'lite' else float('nan'):>12.1f} {stats['load']:>9.2f} "
+                  f"{stats['rss_mb']:>9.0f} {args.rows / stats['predict']:>10,.0f} {difference:>13.2e} "
+                  f"{str(stats['tensorflow']):>12}")
+
+if __name__ == "__main__":
+    main()
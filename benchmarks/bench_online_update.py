@@ -0,0 +1,43 @@
+"""Benchmark online updates against full retraining as the corpus grows"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import synthetic_ratings, synthetic_sequences
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AdRatingModel.update vs train')
+    parser.add_argument('--corpus', type=int, nargs='+', default=[1000, 4000, 16000],
+                        help='Corpus sizes already rated')
+    parser.add_argument('--new', type=int, default=16, help='Newly rated sequences per update')
+    args = parser.parse_args()
+
+    new_sequences = synthetic_sequences(args.new, seed=99)
+    new_ratings = synthetic_ratings(args.new, seed=99)
+
+    print(f"{'corpus':>8} {'full retrain (s)':>17} {'online update (ms)':>19}")
+    for size in args.corpus:
+        sequences = synthetic_sequences(size) + new_sequences
+        ratings = synthetic_ratings(size) + new_ratings
+
+        model = AdRatingModel()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.train(sequences, ratings)
+        retrain = time.perf_counter() - start
+
+        # Warm up once so the timing excludes graph tracing
+        model.update(new_sequences, new_ratings)
+        start = time.perf_counter()
+        model.update(new_sequences, new_ratings)
+        update = time.perf_counter() - start
+        print(f"{size:>8} {retrain:>17.2f} {update * 1000:>19.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark Keras vs NumPy inference for AdRatingModel"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import fit_synthetic_model, synthetic_sequences
+
+def per_call_seconds(func, calls):
+    """Mean seconds per call of a zero-argument callable"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AdRatingModel inference paths')
+    parser.add_argument('--train-sequences', type=int, default=2000, help='Sequences used to fit the model')
+    parser.add_argument('--calls', type=int, default=200, help='Single predictions per path')
+    parser.add_argument('--batch', type=int, default=100000, help='Rows in the throughput batch')
+    args = parser.parse_args()
+
+    model = AdRatingModel()
+    sequence = fit_synthetic_model(model, args.train_sequences)[0]
+
+    keras_latency = per_call_seconds(lambda: model.predict(sequence, fast=False), args.calls)
+    fast_latency = per_call_seconds(lambda: model.predict(sequence, fast=True), args.calls)
+
+    rows = model.extract_features_batch(synthetic_sequences(args.batch, seed=1))
+    start = time.perf_counter()
+    keras_scores = model.model.predict(model.scaler.transform(rows), batch_size=4096, verbose=0)[:, 0]
+    keras_throughput = len(rows) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    fast_scores = model.forward(rows)
+    fast_throughput = len(rows) / (time.perf_counter() - start)
+
+    print(f"{'path':<8} {'latency (ms)':>13} {'batch rows/s':>14}")
+    print(f"{'keras':<8} {keras_latency * 1000:>13.3f} {keras_throughput:>14,.0f}")
+    print(f"{'numpy':<8} {fast_latency * 1000:>13.3f} {fast_throughput:>14,.0f}")
+    print(f"max abs difference: {np.abs(keras_scores - fast_scores).max():.2e}")
+
+if __name__ == "__main__":
+    main()
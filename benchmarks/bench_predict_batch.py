@@ -0,0 +1,65 @@
+"""Benchmark per-sequence predict loops against predict_batch"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from fixtures import AD_KINDS
+from ml_model import AdRatingModel
+from synthetic import fit_synthetic_model, synthetic_sequences
+
+def synthetic_elements(count, seed=0):
+    """Detected ad elements shaped like detect_ad_content's single-pass output"""
+    rng = random.Random(seed)
+    return [{'x': rng.randint(0, 1000), 'y': rng.randint(0, 20000), 'width': 300, 'height': 250,
+             'type': rng.choice(AD_KINDS), 'text_length': rng.randint(0, 500)} for _ in range(count)]
+
+def timed(func):
+    """Return (result, seconds) for a zero-argument callable"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch prediction')
+    parser.add_argument('--sequences', type=int, default=10000, help='Sequences scored per path')
+    parser.add_argument('--elements', type=int, default=1000, help='Ad elements scored on one page')
+    args = parser.parse_args()
+
+    model = AdRatingModel()
+    fit_synthetic_model(model)
+    sequences = synthetic_sequences(args.sequences, seed=1)
+    elements = synthetic_elements(args.elements)
+    context = sequences[0]
+
+    def element_loop():
+        scores = []
+        for element in elements:
+            features = model.element_features(context, [element])
+            scores.append(model.predict_batch(features=features)[0])
+        return np.array(scores)
+
+    paths = [
+        ('sequences', 'predict loop', lambda: np.array([model.predict(s) for s in sequences]), args.sequences),
+        ('sequences', 'predict_batch', lambda: model.predict_batch(sequences), args.sequences),
+        ('elements', 'per-element loop', element_loop, args.elements),
+        ('elements', 'predict_batch',
+         lambda: model.predict_batch(features=model.element_features(context, elements)), args.elements)
+    ]
+
+    print(f"{'rows':<10} {'path':<18} {'seconds':>9} {'rows/s':>12}")
+    results = {}
+    for rows, name, func, count in paths:
+        scores, seconds = timed(func)
+        results.setdefault(rows, []).append(scores)
+        print(f"{rows:<10} {name:<18} {seconds:>9.3f} {count / seconds:>12,.0f}")
+    for rows, (looped, batched) in results.items():
+        print(f"max abs difference ({rows}): {np.abs(looped - batched).max():.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark action log replay: browserless feature rebuilds and time-compressed browser replay"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from action_log import ActionLogWriter
+from replay import replay_features, replay_logs
+from synthetic import ACTION_TYPES, synthetic_action
+
+def write_log(path, actions, visit_length, base_url, seed=0):
+    """Write a log of visits, each a navigate followed by visit_length - 1 recorded actions"""
+    rng = random.Random(seed)
+    timestamp = datetime(2024, 1, 1)
+    with ActionLogWriter(path, flush_bytes=1024 * 1024) as writer:
+        for i in range(actions):
+            timestamp += timedelta(milliseconds=rng.randint(100, 2000))
+            if i % visit_length == 0:
+                action = {'timestamp': timestamp.isoformat(), 'type': 'navigate',
+                          'params': {'url': f'{base_url}?visit={i}'}}
+            else:
+                action_type = rng.choice([t for t in ACTION_TYPES if t != 'navigate'])
+                action = synthetic_action(rng, action_type, timestamp)
+            writer.write(action)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark replay throughput')
+    parser.add_argument('--logs', type=int, default=8, help='Logs replayed without a browser')
+    parser.add_argument('--actions', type=int, default=250000, help='Actions per browserless log')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Process counts to compare')
+    parser.add_argument('--browser-actions', type=int, default=0,
+                        help='Actions per log for a browser replay against local fixtures (0 skips it)')
+    parser.add_argument('--browsers', type=int, default=2, help='Pooled browsers for the browser replay')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [write_log(os.path.join(work_dir, f'actions_{i}.jsonl'), args.actions, 20,
+                           'http://127.0.0.1/page', seed=i) for i in range(args.logs)]
+        print(f"{'workers':>8} {'actions':>11} {'seconds':>9} {'actions/s':>12}")
+        for workers in args.workers:
+            _, _, stats = replay_features(paths, workers=workers, chunk_bytes=16 * 1024 * 1024)
+            print(f"{workers:>8} {stats['actions']:>11,} {stats['seconds']:>9.2f} {stats['actions_per_second']:>12,.0f}")
+
+        if not args.browser_actions:
+            return
+
+        from agent_pool import WebAgentPool
+        from fixtures import serve_directory, write_fixtures
+
+        fixture_dir = os.path.join(work_dir, 'fixtures')
+        write_fixtures(fixture_dir, [100])
+        server, base_url = serve_directory(fixture_dir)
+        try:
+            browser_logs = [write_log(os.path.join(work_dir, f'browser_{i}.jsonl'), args.browser_actions, 10,
+                                      f'{base_url}/ads_100.html', seed=i) for i in range(args.browsers)]
+            with WebAgentPool(size=args.browsers) as pool:
+                print(f"\n{'browser replay':<16} {'actions':>8} {'seconds':>9} {'actions/s':>10}")
+                for name, speed in (('time-compressed', None), ('10x speed', 10.0)):
+                    _, stats = replay_logs(browser_logs, pool, speed=speed)
+                    print(f"{name:<16} {stats['actions']:>8} {stats['seconds']:>9.2f} "
+                          f"{stats['actions_per_second']:>10.1f}")
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark script vs DOM snapshot ad detection and recall on nested iframe/shadow root fixtures"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent import WebAgent
+from fixtures import write_nested_fixtures
+from metrics import REGISTRY
+
+def time_detection(agent, snapshot, repeats):
+    """Return (mean seconds per detect_ad_content call, candidates found, WebDriver calls per detection)"""
+    REGISTRY.reset()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        ad_data = agent.detect_ad_content(snapshot=snapshot)
+    seconds = (time.perf_counter() - start) / repeats
+    calls = REGISTRY.counters.get('webdriver.round_trips', 0) / repeats
+    return seconds, ad_data['count'], calls
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark snapshot-based detect_ad_content')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Ad slots per fixture page')
+    parser.add_argument('--depth', type=int, default=2, help='Nested iframe levels holding a third of the ads')
+    parser.add_argument('--repeats', type=int, default=5, help='Detections per page and mode')
+    args = parser.parse_args()
+
+    agent = WebAgent()
+    try:
+        agent.initialize(chrome_options={'headless': True})
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            paths = write_nested_fixtures(fixture_dir, args.counts, args.depth)
+            print(f"{'ads':>6} {'script (s)':>11} {'recall':>7} {'calls':>6} "
+                  f"{'snapshot (s)':>13} {'recall':>7} {'calls':>6}")
+            for count, path in paths.items():
+                agent.navigate_to(f'file://{path}')
+                script = time_detection(agent, False, args.repeats)
+                snapshot = time_detection(agent, True, args.repeats)
+                print(f"{count:>6} {script[0]:>11.4f} {script[1] / count:>7.1%} {script[2]:>6.0f} "
+                      f"{snapshot[0]:>13.4f} {snapshot[1] / count:>7.1%} {snapshot[2]:>6.0f}")
+    finally:
+        agent.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark cold startup of the agent module and the MCP server"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+STARTUP_SNIPPETS = {
+    'import agent': 'import agent',
+    'WebAgent()': 'from agent import WebAgent; WebAgent()',
+    'AdAgentServer()': 'from mcp_server import AdAgentServer; AdAgentServer()',
+    'import tensorflow': 'import tensorflow',
+}
+
+def cold_start_seconds(snippet):
+    """Wall time of a fresh interpreter running snippet, or None if it fails"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=SRC_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    return elapsed if result.returncode == 0 else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark agent and MCP server startup time')
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters per snippet')
+    args = parser.parse_args()
+
+    print(f"{'startup':<20} {'median (s)':>11} {'min (s)':>9}")
+    for name, snippet in STARTUP_SNIPPETS.items():
+        samples = [cold_start_seconds(snippet) for _ in range(args.repeats)]
+        if None in samples:
+            print(f"{name:<20} {'failed':>11}")
+            continue
+        print(f"{name:<20} {statistics.median(samples):>11.3f} {min(samples):>9.3f}")
+
+if __name__ == "__main__":
+    main()
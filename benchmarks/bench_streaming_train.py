@@ -0,0 +1,59 @@
+"""Benchmark out-of-core streaming training against in-memory training"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import synthetic_columns
+from training_store import TrainingStore
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (Linux reports KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AdRatingModel.train_streaming')
+    parser.add_argument('--sequences', type=int, default=1000000, help='Sequences in the store')
+    parser.add_argument('--shard-size', type=int, default=250000, help='Sequences per shard')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='Sequences per streamed chunk')
+    parser.add_argument('--batch-size', type=int, default=1024, help='Training batch size')
+    parser.add_argument('--epochs', type=int, default=1, help='Training epochs')
+    parser.add_argument('--in-memory', action='store_true', help='Also time in-memory fit_features')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = TrainingStore(store_dir)
+        # Ratings use their own seed so they are independent of the synthetic columns
+        rng = np.random.default_rng(12345)
+        for seed, start in enumerate(range(0, args.sequences, args.shard_size)):
+            count = min(args.shard_size, args.sequences - start)
+            store.append_columns(synthetic_columns(count, seed=seed), rng.integers(0, 2, size=count))
+        print(f"store: {len(store):,} sequences, peak RSS after build {peak_rss_mb():.0f} MB")
+
+        model = AdRatingModel()
+        start = time.perf_counter()
+        model.train_streaming(store, chunk_size=args.chunk_size, epochs=args.epochs,
+                              batch_size=args.batch_size)
+        seconds = time.perf_counter() - start
+        print(f"streaming: {args.sequences * args.epochs / seconds:,.0f} samples/s, "
+              f"peak RSS {peak_rss_mb():.0f} MB")
+
+        if args.in_memory:
+            model = AdRatingModel()
+            start = time.perf_counter()
+            X, y = store.load_features(model)
+            model.model.fit(model.scaler.fit_transform(X), y, epochs=args.epochs,
+                            batch_size=args.batch_size, verbose=0)
+            seconds = time.perf_counter() - start
+            print(f"in-memory: {args.sequences * args.epochs / seconds:,.0f} samples/s, "
+                  f"peak RSS {peak_rss_mb():.0f} MB")
+
+if __name__ == "__main__":
+    main()
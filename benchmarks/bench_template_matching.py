@@ -0,0 +1,59 @@
+"""Benchmark TemplateRegistry latency by template count and screenshot size"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from template_matching import TemplateRegistry
+
+SCREEN_SIZES = {'720p': (720, 1280), '1080p': (1080, 1920), '1440p': (1440, 2560)}
+
+def textured(rng, shape):
+    """Smoothed random texture so correlation peaks are well defined"""
+    return cv2.GaussianBlur((rng.random(shape) * 255).astype(np.uint8), (5, 5), 0)
+
+def original_match(screenshot, template):
+    """The previous single-template, full-resolution color match"""
+    result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+    return cv2.minMaxLoc(result)
+
+def mean_seconds(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark multi-template matching')
+    parser.add_argument('--templates', type=int, nargs='+', default=[1, 5, 20], help='Template counts')
+    parser.add_argument('--sizes', nargs='+', default=list(SCREEN_SIZES), help='Screenshot sizes')
+    parser.add_argument('--repeats', type=int, default=3, help='Matches per configuration')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'screen':<7} {'templates':>9} {'loop (ms)':>10} {'registry (ms)':>14} {'full-res (ms)':>14} {'hits':>5}")
+    for size in args.sizes:
+        height, width = SCREEN_SIZES[size]
+        for count in args.templates:
+            screen = textured(rng, (height, width, 3))
+            templates = [textured(rng, (60, 90, 3)) for _ in range(count)]
+            registry = TemplateRegistry()
+            for i, template in enumerate(templates):
+                y, x = rng.integers(0, height - 60), rng.integers(0, width - 90)
+                screen[y:y + 60, x:x + 90] = template
+                registry.register(f'template_{i}', template[..., ::-1].copy())
+
+            loop = mean_seconds(lambda: [original_match(screen, t) for t in templates], args.repeats)
+            coarse = mean_seconds(lambda: registry.match(screen), args.repeats)
+            full = mean_seconds(lambda: registry.match(screen, coarse_level=0), args.repeats)
+            hits = len(registry.match(screen))
+            print(f"{size:<7} {count:>9} {loop * 1000:>10.1f} {coarse * 1000:>14.1f} "
+                  f"{full * 1000:>14.1f} {hits:>5}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark JSON training data vs the columnar training store"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import synthetic_ratings, synthetic_sequences
+from training_store import TrainingStore
+
+def directory_size(path):
+    """Total size in bytes of all files below path"""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training data storage formats')
+    parser.add_argument('--sequences', type=int, default=100000, help='Synthetic sequences to store')
+    parser.add_argument('--shards', type=int, default=4, help='Appends used to build the store')
+    args = parser.parse_args()
+
+    sequences = synthetic_sequences(args.sequences)
+    ratings = synthetic_ratings(args.sequences)
+    model = AdRatingModel()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        json_path = os.path.join(data_dir, 'training_data.json')
+        start = time.perf_counter()
+        with open(json_path, 'w') as f:
+            json.dump({'sequences': sequences, 'ratings': ratings}, f, indent=4, default=str)
+        json_save = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        json_X = model.extract_features_batch(data['sequences'])
+        json_load = time.perf_counter() - start
+
+        store = TrainingStore(os.path.join(data_dir, 'store'))
+        chunk = -(-args.sequences // args.shards)
+        start = time.perf_counter()
+        for i in range(0, args.sequences, chunk):
+            store.append(sequences[i:i + chunk], ratings[i:i + chunk])
+        store_save = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store_X, _ = store.load_features(model)
+        store_load = time.perf_counter() - start
+
+        print(f"{'format':<8} {'save (s)':>9} {'load+features (s)':>18} {'size (MB)':>10}")
+        print(f"{'json':<8} {json_save:>9.2f} {json_load:>18.3f} {os.path.getsize(json_path) / 1e6:>10.1f}")
+        print(f"{'store':<8} {store_save:>9.2f} {store_load:>18.3f} "
+              f"{directory_size(store.path) / 1e6:>10.1f}")
+        print(f"max abs feature difference: {np.abs(json_X - store_X).max():.2e}")
+
+if __name__ == "__main__":
+    main()
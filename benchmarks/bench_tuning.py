@@ -0,0 +1,39 @@
+"""Benchmark cross-validated hyperparameter search across worker counts"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml_model import AdRatingModel
+from synthetic import synthetic_ratings, synthetic_sequences
+from tuning import tune
+
+# Small grid so a run finishes in minutes: 4 settings
+SPACE = {'layers': [(64, 32, 16), (32, 16)], 'dropout': [0.0, 0.2], 'epochs': [5]}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tuning.tune by worker count')
+    parser.add_argument('--sequences', type=int, default=5000, help='Synthetic rated sequences')
+    parser.add_argument('--folds', type=int, default=3, help='Cross-validation folds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to time')
+    args = parser.parse_args()
+
+    X = AdRatingModel().extract_features_batch(synthetic_sequences(args.sequences))
+    y = synthetic_ratings(args.sequences)
+    tasks = 4 * args.folds
+
+    print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'fits/s':>8} {'best val_loss':>14}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as path:
+            start = time.perf_counter()
+            result = tune(X, y, SPACE, folds=args.folds, workers=workers, path=path)
+            seconds = time.perf_counter() - start
+        threads = max(1, (os.cpu_count() or 1) // min(workers, tasks))
+        print(f"{workers:>8} {threads:>8} {seconds:>9.2f} {tasks / seconds:>8.2f} "
+              f"{result['results'][0]['val_loss']:>14.4f}")
+
+if __name__ == "__main__":
+    main()
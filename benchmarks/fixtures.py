@@ -0,0 +1,143 @@
+"""Generated HTML pages with ad slots for local benchmarking"""
+import os
+import random
+
+AD_KINDS = ['iframe', 'video', 'image', 'text']
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Ad fixture ({count} slots)</title>{head}</head>
+<body>
+<h1>Benchmark page</h1>
+{body}
+</body>
+</html>
+"""
+
+# Distinct creative images written when fixtures reference real assets
+ASSET_CREATIVES = 16
+
+# Web font and stylesheet referenced by pages with assets
+ASSET_HEAD = """
+<style>
+@font-face { font-family: 'Fixture'; src: url('assets/fixture.woff2') format('woff2'); }
+body { font-family: 'Fixture', sans-serif; }
+</style>"""
+
+def render_ad(index, kind, assets=False):
+    """Render a single ad slot of the given kind, optionally loading asset files"""
+    if kind == 'iframe':
+        return f'<iframe src="about:blank?ad={index}" width="300" height="250"></iframe>'
+    if kind == 'video':
+        source = f' src="assets/clip.mp4?ad={index}" preload="auto"' if assets else ''
+        return f'<div class="ad-slot" id="ad-{index}"><video width="300" height="170"{source}></video></div>'
+    if kind == 'image':
+        source = f' src="assets/creative_{index % ASSET_CREATIVES}.png?ad={index}"' if assets else ''
+        return (f'<div class="advertisement" id="ad-{index}">'
+                f'<img width="300" height="250"{source} alt="creative {index}"></div>')
+    return f'<div class="ad-text" id="ad-{index}">Sponsored link number {index}</div>'
+
+def generate_ad_page(ad_count, seed=0, assets=False):
+    """Generate an HTML page with ad_count mixed ad slots between content paragraphs"""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(ad_count):
+        parts.append(f'<p>Content paragraph {i} for the benchmark page.</p>')
+        parts.append(render_ad(i, rng.choice(AD_KINDS), assets))
+    return PAGE_TEMPLATE.format(count=ad_count, head=ASSET_HEAD if assets else '', body='\n'.join(parts))
+
+def generate_nested_ad_page(ad_count, depth=2, seed=0):
+    """Generate a page with ad_count slots spread over the top document, shadow roots and nested iframes
+
+    Every third ad is inside an open shadow root and every third is inside
+    the innermost of depth nested srcdoc iframes, where a CSS selector on
+    the top document cannot see them. No wrapper class or id contains 'ad',
+    so every detected candidate is a planted ad.
+    """
+    import html
+
+    rng = random.Random(seed)
+    top, framed = [], []
+    for i in range(ad_count):
+        ad = render_ad(i, rng.choice(AD_KINDS))
+        if i % 3 == 0:
+            top.append(f'<p>Content paragraph {i} for the benchmark page.</p>\n{ad}')
+        elif i % 3 == 1:
+            top.append(f'<div class="host"><template shadowrootmode="open">{ad}</template></div>')
+        else:
+            framed.append(ad)
+
+    inner = '\n'.join(framed)
+    for level in range(depth):
+        document = PAGE_TEMPLATE.format(count=len(framed), head='', body=inner)
+        inner = (f'<iframe class="frame-box" width="800" height="{600 + 100 * level}" '
+                 f'srcdoc="{html.escape(document, quote=True)}"></iframe>')
+    top.append(inner)
+    return PAGE_TEMPLATE.format(count=ad_count, head='', body='\n'.join(top))
+
+def write_nested_fixtures(directory, ad_counts=(10, 100, 1000), depth=2, seed=0):
+    """Write one nested iframe/shadow root fixture page per ad count and return their file paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for count in ad_counts:
+        path = os.path.join(directory, f'nested_ads_{count}.html')
+        with open(path, 'w') as f:
+            f.write(generate_nested_ad_page(count, depth, seed))
+        paths[count] = os.path.abspath(path)
+    return paths
+
+def write_assets(directory, seed=0):
+    """Write the creative images, font and video clips referenced by asset pages"""
+    import cv2
+    import numpy as np
+
+    asset_dir = os.path.join(directory, 'assets')
+    os.makedirs(asset_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i in range(ASSET_CREATIVES):
+        creative = rng.integers(0, 256, (250, 300, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(asset_dir, f'creative_{i}.png'), creative)
+    # Not valid font/video data; the browser still downloads them before giving up
+    with open(os.path.join(asset_dir, 'fixture.woff2'), 'wb') as f:
+        f.write(rng.bytes(64 * 1024))
+    with open(os.path.join(asset_dir, 'clip.mp4'), 'wb') as f:
+        f.write(rng.bytes(512 * 1024))
+    return asset_dir
+
+def write_fixtures(directory, ad_counts=(10, 100, 1000), seed=0, assets=False):
+    """Write one fixture page per ad count and return their file paths"""
+    os.makedirs(directory, exist_ok=True)
+    if assets:
+        write_assets(directory, seed)
+    paths = {}
+    for count in ad_counts:
+        path = os.path.join(directory, f'ads_{count}.html')
+        with open(path, 'w') as f:
+            f.write(generate_ad_page(count, seed, assets))
+        paths[count] = os.path.abspath(path)
+    return paths
+
+def serve_directory(directory, port=0, latency=0.0):
+    """Serve a directory over HTTP from a background thread, returning (server, base_url)
+
+    latency adds a delay in seconds to every request to stand in for a real network.
+    """
+    import functools
+    import threading
+    import time
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_head(self):
+            if latency:
+                time.sleep(latency)
+            return super().send_head()
+
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
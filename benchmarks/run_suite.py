@@ -0,0 +1,154 @@
+"""End-to-end benchmark suite: navigate -> detect -> predict against a local page server
+
+Generates ad-laden fixture pages at several scales, serves them from a
+local HTTP server and drives WebAgent in headless Chrome. Each run
+reports per-page latency percentiles and pages per second, can be saved
+as JSON and compared against an earlier run to flag regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent import WebAgent
+from fixtures import serve_directory, write_fixtures
+from metrics import REGISTRY
+from synthetic import fit_synthetic_model
+
+DEFAULT_SCALES = [1, 10, 100, 1000, 5000]
+
+# Per-stage timers recorded by the agent and model during a page
+STAGES = {
+    'navigate': 'agent.navigate_to',
+    'detect': 'agent.detect_ad_content',
+    'predict': 'model.predict'
+}
+
+# Metrics compared between runs and whether higher values are better
+COMPARED_METRICS = {'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'pages_per_second': True}
+
+def latency_summary(samples_ms, elapsed):
+    """Percentiles and throughput for one scale"""
+    samples = np.asarray(samples_ms)
+    return {
+        'pages': len(samples),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(samples.mean()),
+        'pages_per_second': len(samples) / elapsed
+    }
+
+def run_scale(agent, base_url, scale, pages, warmup):
+    """Score the fixture for one scale repeatedly and summarize the timings"""
+    urls = [f'{base_url}/ads_{scale}.html?page={i}' for i in range(warmup + pages)]
+    for url in urls[:warmup]:
+        agent.predict_url(url)
+
+    REGISTRY.reset()
+    samples = []
+    start = time.perf_counter()
+    for url in urls[warmup:]:
+        page_start = time.perf_counter()
+        result = agent.predict_url(url)
+        samples.append((time.perf_counter() - page_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    summary = latency_summary(samples, elapsed)
+    summary['ads_detected'] = result['ad_data']['count'] if result['ad_data'] else None
+    timers = REGISTRY.snapshot()['timers']
+    summary['stages'] = {stage: {key: timers[name][key] for key in ('p50_ms', 'p95_ms', 'p99_ms')}
+                         for stage, name in STAGES.items() if name in timers}
+    summary['webdriver_round_trips_per_page'] = \
+        REGISTRY.snapshot()['counters'].get('webdriver.round_trips', 0) / pages
+    return summary
+
+def run_suite(scales, pages, warmup, model_path=None, seed=0):
+    """Run every scale and return the results document"""
+    agent = WebAgent()
+    if not (model_path and agent.ad_rating_model.load(model_path)):
+        fit_synthetic_model(agent.ad_rating_model)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pages_per_scale': pages,
+            'seed': seed
+        },
+        'scales': {}
+    }
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        write_fixtures(fixture_dir, scales, seed=seed)
+        server, base_url = serve_directory(fixture_dir)
+        try:
+            agent.initialize(chrome_options={'headless': True})
+            for scale in scales:
+                results['scales'][str(scale)] = run_scale(agent, base_url, scale, pages, warmup)
+        finally:
+            agent.close()
+            server.shutdown()
+    return results
+
+def compare_runs(baseline, current, threshold):
+    """Return (rows, regressions) comparing matching scales of two runs"""
+    rows = []
+    regressions = []
+    for scale, metrics in current['scales'].items():
+        before = baseline['scales'].get(scale)
+        if not before:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            change = (metrics[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            worse = -change if higher_is_better else change
+            rows.append((scale, metric, before[metric], metrics[metric], change))
+            if worse > threshold:
+                regressions.append((scale, metric, change))
+    return rows, regressions
+
+def print_results(results):
+    print(f"{'ads':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'pages/s':>9} {'trips/page':>11}")
+    for scale, summary in results['scales'].items():
+        print(f"{scale:>6} {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} "
+              f"{summary['pages_per_second']:>9.2f} {summary['webdriver_round_trips_per_page']:>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end WebAgent benchmark suite')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='Ad elements per page')
+    parser.add_argument('--pages', type=int, default=20, help='Measured pages per scale')
+    parser.add_argument('--warmup', type=int, default=2, help='Unmeasured pages per scale')
+    parser.add_argument('--model-path', type=str, help='Trained model directory (default: synthetic fit)')
+    parser.add_argument('--output', type=str, help='Write results JSON here')
+    parser.add_argument('--compare', type=str, help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.pages, args.warmup, args.model_path)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows, regressions = compare_runs(baseline, results, args.threshold)
+        print(f"\n{'ads':>6} {'metric':<17} {'baseline':>10} {'current':>10} {'change':>8}")
+        for scale, metric, before, after, change in rows:
+            print(f"{scale:>6} {metric:<17} {before:>10.2f} {after:>10.2f} {change:>+7.1%}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
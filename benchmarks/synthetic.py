@@ -0,0 +1,92 @@
+"""Synthetic recorded action sequences for browserless benchmarks"""
+import random
+from datetime import datetime, timedelta
+
+ACTION_TYPES = ['navigate', 'scroll', 'click', 'detect_ads', 'hover', 'ad_visible']
+
+def synthetic_action(rng, action_type, timestamp):
+    """Build one recorded action dict like WebAgent.record_action does"""
+    if action_type == 'scroll':
+        params = {'direction': rng.choice(['up', 'down']), 'amount': rng.randint(50, 1000)}
+    elif action_type == 'click':
+        params = {'x': rng.randint(0, 1280), 'y': rng.randint(0, 4000)}
+    elif action_type == 'detect_ads':
+        params = {
+            'count': rng.randint(0, 30),
+            'ad_position': rng.randint(0, 3000),
+            'image_present': rng.randint(0, 1),
+            'video_present': rng.randint(0, 1),
+            'text_length': rng.randint(0, 2000)
+        }
+    elif action_type in ('hover', 'ad_visible'):
+        params = {'ad': rng.randint(0, 30), 'duration': rng.randint(50, 20000)}
+    else:
+        params = {'url': f'http://127.0.0.1/page/{rng.randint(0, 999)}'}
+    return {'timestamp': timestamp.isoformat(), 'type': action_type, 'params': params}
+
+def synthetic_sequences(count, min_length=1, max_length=20, seed=0):
+    """Generate count recorded action sequences with rising timestamps"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    sequences = []
+    for _ in range(count):
+        timestamp = start + timedelta(seconds=rng.randint(0, 86400))
+        sequence = []
+        for _ in range(rng.randint(min_length, max_length)):
+            timestamp += timedelta(milliseconds=rng.randint(10, 5000))
+            sequence.append(synthetic_action(rng, rng.choice(ACTION_TYPES), timestamp))
+        sequences.append(sequence)
+    return sequences
+
+def synthetic_ratings(count, seed=0):
+    """Generate binary ratings matching synthetic_sequences"""
+    rng = random.Random(seed + 1)
+    return [rng.randint(0, 1) for _ in range(count)]
+
+def synthetic_columns(count, max_length=20, seed=0):
+    """Generate count sequences directly in TrainingStore column layout
+
+    Avoids building action dicts so million-sequence stores fit in memory.
+    """
+    import numpy as np
+    from ml_model import PARAM_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, max_length + 1, size=count)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    n_actions = int(offsets[-1])
+
+    starts = np.repeat(rng.uniform(1.7e9, 1.7e9 + 86400, size=count), lengths)
+    steps = rng.uniform(0.01, 5.0, size=n_actions)
+    # Restart the cumulative time offset at every sequence boundary
+    elapsed = np.cumsum(steps)
+    elapsed -= np.repeat(elapsed[offsets[:-1]] - steps[offsets[:-1]], lengths)
+    params = rng.integers(0, 1000, size=(n_actions, len(PARAM_COLUMNS)), dtype=np.int32)
+
+    return {
+        'codes': rng.integers(0, len(ACTION_TYPES), size=n_actions, dtype=np.uint8),
+        'timestamps': starts + elapsed,
+        'params': params,
+        'offsets': offsets
+    }
+
+def fit_synthetic_model(model, count=2000, epochs=2):
+    """Fit an AdRatingModel on synthetic data so predictions can run without a trained model"""
+    import numpy as np
+
+    sequences = synthetic_sequences(count)
+    features = model.extract_features_batch(sequences)
+    model.model.fit(model.scaler.fit_transform(features), np.array(synthetic_ratings(count)),
+                    epochs=epochs, verbose=0)
+    model.inference_layers = None
+    return sequences
+
+def save_synthetic_model(path, count=2000, epochs=2):
+    """Fit a synthetic AdRatingModel and save it to path, for benchmarks whose agents load a model_path"""
+    from ml_model import AdRatingModel
+
+    model = AdRatingModel()
+    fit_synthetic_model(model, count, epochs)
+    model.save(path)
+    return path
@@ -0,0 +1,129 @@
+import gzip
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+# Numbers the logs opened by this process, so concurrent writers never share a file
+_log_counter = itertools.count()
+
+def action_log_path(log_dir, compress=False):
+    """Build a timestamped action log filename inside log_dir, unique to this writer
+
+    The process id and a per-process counter keep agents that start
+    recording in the same second (pooled agents, parallel MCP sessions)
+    from appending to one file.
+    """
+    extension = 'jsonl.gz' if compress else 'jsonl'
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(log_dir, f'actions_{timestamp}_{os.getpid()}_{next(_log_counter)}.{extension}')
+
+def open_log_file(path, mode):
+    """Open a plain or gzip-compressed log file in text mode"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class ActionLogWriter:
+    """Append-only JSON Lines writer that buffers actions and flushes by size or time
+
+    A background thread flushes buffered actions every flush_interval
+    seconds even when no new action arrives, so a crash loses at most
+    flush_bytes or flush_interval seconds of actions.
+    Compressed logs are written as concatenated gzip members, which
+    read_action_log reads back transparently.
+    """
+
+    def __init__(self, path, flush_bytes=64 * 1024, flush_interval=5.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._file = open_log_file(path, 'a')
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, name='action-log-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            with self._lock:
+                if self._file.closed:
+                    return
+                if self._buffer:
+                    self._flush_locked()
+
+    def write(self, action):
+        """Buffer one action, flushing when the size or time limit is reached"""
+        line = json.dumps(action, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            self.count += 1
+            if (self._buffered_bytes >= self.flush_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._file.flush()
+            self._buffer = []
+            self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Write all buffered actions to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush and close the underlying file"""
+        self._stopped.set()
+        if self._flusher and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_locked()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_action_log(path):
+    """Yield recorded actions one at a time from a JSON Lines or legacy JSON log
+
+    A truncated tail, as left by a crash mid-write, ends the replay instead
+    of raising.
+    """
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            yield from json.load(f)
+        return
+
+    with open_log_file(path, 'r') as f:
+        try:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Stopped reading {path} at truncated line {line_number}")
+                    return
+        except EOFError:
+            # Compressed stream cut off mid-member
+            logging.warning(f"Stopped reading {path} at truncated gzip data")
@@ -0,0 +1,246 @@
+from datetime import datetime
+import numpy as np
+from ml_model import ACTION_CODES, PARAM_COLUMNS
+from training_store import INT32_MAX, INT32_MIN, UNKNOWN_ACTION
+
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+COLUMN_INDEX = {name: i for i, name in enumerate(PARAM_COLUMNS)}
+
+# Mask bits set when a scroll's direction is folded into the sign of its amount
+DIRECTION_BIT = 1 << 15
+UP_BIT = 1 << 14
+
+class ActionBuffer:
+    """Recorded actions stored as growable typed columns
+
+    Every action takes a float64 epoch timestamp, a uint8 action code, one
+    int32 per PARAM_COLUMNS entry and a uint16 mask of which params were
+    set. Anything that does not fit those columns (URLs, unknown action
+    types, non-integer values, timestamps with a UTC offset) is kept in a
+    small per-row dict. Rows read back as the original action dicts, with
+    timestamps normalized to datetime.isoformat(), and columns() fills in
+    non-integer numbers so features match the action dicts.
+    """
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.codes = np.zeros(capacity, dtype=np.uint8)
+        self.masks = np.zeros(capacity, dtype=np.uint16)
+        self.params = np.zeros((capacity, len(PARAM_COLUMNS)), dtype=np.int32)
+        self.extra_params = {}
+        self.extra_types = {}
+        self.extra_timestamps = {}
+        # Numeric params that did not fit int32, by row and column, for columns()
+        self.extra_numbers = {}
+        # Repeated strings such as URLs are stored once
+        self._strings = {}
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.codes))
+        for name in ('timestamps', 'codes', 'masks', 'params'):
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, action):
+        """Append one action dict"""
+        row = self.size
+        if row == len(self.codes):
+            self._grow(row + 1)
+
+        action_type = action['type']
+        code = ACTION_CODES.get(action_type)
+        if code is None:
+            code = UNKNOWN_ACTION
+            self.extra_types[row] = action_type
+        self.codes[row] = code
+
+        timestamp = action['timestamp']
+        parsed = datetime.fromisoformat(timestamp)
+        self.timestamps[row] = parsed.timestamp()
+        if parsed.tzinfo is not None:
+            self.extra_timestamps[row] = timestamp
+
+        mask = 0
+        direction = None
+        extras = None
+        values = self.params[row]
+        values[:] = 0
+        for name, value in (action.get('params') or {}).items():
+            column = COLUMN_INDEX.get(name)
+            if column is not None and type(value) is int and INT32_MIN <= value <= INT32_MAX:
+                values[column] = value
+                mask |= 1 << column
+            elif name == 'direction' and value in ('up', 'down'):
+                direction = value
+            else:
+                if extras is None:
+                    extras = {}
+                extras[name] = self._strings.setdefault(value, value) if isinstance(value, str) else value
+
+        if direction is not None:
+            amount = COLUMN_INDEX['amount']
+            if mask & (1 << amount) and values[amount] >= 0:
+                if direction == 'up':
+                    values[amount] = -values[amount]
+                    mask |= UP_BIT
+                mask |= DIRECTION_BIT
+            else:
+                extras = dict(extras or {}, direction=direction)
+        if extras:
+            self.extra_params[row] = extras
+            numbers = {COLUMN_INDEX[name]: value for name, value in extras.items()
+                       if name in COLUMN_INDEX and isinstance(value, (int, float))}
+            if numbers:
+                amount = COLUMN_INDEX['amount']
+                if amount in numbers and extras.get('direction') == 'up':
+                    numbers[amount] = -abs(numbers[amount])
+                self.extra_numbers[row] = numbers
+
+        self.masks[row] = mask
+        self.size = row + 1
+
+    def extend(self, actions):
+        for action in actions:
+            self.append(action)
+
+    def action(self, row):
+        """Rebuild the action dict stored at row"""
+        mask = int(self.masks[row])
+        values = self.params[row].tolist()
+        params = {name: values[i] for i, name in enumerate(PARAM_COLUMNS) if mask & (1 << i)}
+        if mask & DIRECTION_BIT:
+            params['direction'] = 'up' if mask & UP_BIT else 'down'
+            params['amount'] = abs(params['amount'])
+        extras = self.extra_params.get(row)
+        if extras:
+            params.update(extras)
+
+        timestamp = self.extra_timestamps.get(row)
+        if timestamp is None:
+            timestamp = datetime.fromtimestamp(float(self.timestamps[row])).isoformat()
+        code = int(self.codes[row])
+        action_type = self.extra_types[row] if code == UNKNOWN_ACTION else ACTION_NAMES[code]
+        return {'timestamp': timestamp, 'type': action_type, 'params': params}
+
+    def columns(self, start, stop):
+        """Views of the codes, timestamps and params columns for rows start:stop
+
+        params is a float64 copy instead when some row holds a number that
+        does not fit int32.
+        """
+        params = self.params[start:stop]
+        rows = [row for row in self.extra_numbers if start <= row < stop]
+        if rows:
+            params = params.astype(np.float64)
+            for row in rows:
+                for column, value in self.extra_numbers[row].items():
+                    params[row - start, column] = value
+        return {
+            'codes': self.codes[start:stop],
+            'timestamps': self.timestamps[start:stop],
+            'params': params
+        }
+
+    def truncate(self, size):
+        """Drop every row from size on, and interned strings only those rows used"""
+        dropped = [row for row in self.extra_params if row >= size]
+        for extras in (self.extra_params, self.extra_types, self.extra_timestamps, self.extra_numbers):
+            for row in [row for row in extras if row >= size]:
+                del extras[row]
+        self.size = min(size, self.size)
+        if not self.extra_params:
+            self._strings = {}
+        elif dropped:
+            self._strings = {value: value for extras in self.extra_params.values()
+                             for value in extras.values() if isinstance(value, str)}
+
+    def sort_range(self, start):
+        """Stably sort rows from start on by timestamp"""
+        order = np.argsort(self.timestamps[start:self.size], kind='stable')
+        if (order == np.arange(len(order))).all():
+            return
+        for name in ('timestamps', 'codes', 'masks', 'params'):
+            column = getattr(self, name)
+            column[start:self.size] = column[start:self.size][order]
+        # Row i of the sorted range came from row order[i]
+        new_row = {int(old) + start: new + start for new, old in enumerate(order)}
+        for extras in (self.extra_params, self.extra_types, self.extra_timestamps, self.extra_numbers):
+            moved = {new_row[row]: value for row, value in extras.items() if row >= start}
+            for row in [row for row in extras if row >= start]:
+                del extras[row]
+            extras.update(moved)
+
+    def copy_range(self, start, stop):
+        """New buffer holding rows start:stop"""
+        count = stop - start
+        copy = ActionBuffer(max(count, 1))
+        for name in ('timestamps', 'codes', 'masks', 'params'):
+            getattr(copy, name)[:count] = getattr(self, name)[start:stop]
+        for name in ('extra_params', 'extra_types', 'extra_timestamps', 'extra_numbers'):
+            getattr(copy, name).update({row - start: value for row, value in getattr(self, name).items()
+                                        if start <= row < stop})
+        copy.size = count
+        return copy
+
+    def nbytes(self):
+        """Bytes held by the column arrays (allocated capacity, not just used rows)"""
+        return sum(getattr(self, name).nbytes for name in ('timestamps', 'codes', 'masks', 'params'))
+
+class ActionSequence:
+    """List-like view of rows start:stop of an ActionBuffer, yielding action dicts
+
+    A stop of None follows the end of the buffer, which is how the
+    sequence currently being recorded is exposed.
+    """
+    __slots__ = ('buffer', 'start', 'stop')
+
+    def __init__(self, buffer, start=0, stop=None):
+        self.buffer = buffer
+        self.start = start
+        self.stop = stop
+
+    def _stop(self):
+        return len(self.buffer) if self.stop is None else self.stop
+
+    def __len__(self):
+        return self._stop() - self.start
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            first, last, step = index.indices(length)
+            if step != 1:
+                return [self[i] for i in range(first, last, step)]
+            return ActionSequence(self.buffer, self.start + first, self.start + max(first, last))
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("action index out of range")
+        return self.buffer.action(self.start + index)
+
+    def __iter__(self):
+        action = self.buffer.action
+        for row in range(self.start, self._stop()):
+            yield action(row)
+
+    def __eq__(self, other):
+        if isinstance(other, (ActionSequence, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ActionSequence({len(self)} actions)"
+
+    def copy(self):
+        """Materialize the actions as a list of dicts"""
+        return list(self)
+
+    def columns(self):
+        """Column views for the actions in this sequence"""
+        return self.buffer.columns(self.start, self._stop())
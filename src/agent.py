@@ -3,25 +3,155 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 import cv2
 import numpy as np
 import logging
-import json
 from datetime import datetime
 import os
+import time
 from PIL import Image
 import io
 import base64
-from ml_model import TrainingSession, AdRatingModel
+from contextlib import contextmanager
+from action_log import ActionLogWriter, action_log_path
+from interaction_capture import InteractionCapture, events_to_actions
+from template_matching import TemplateRegistry
+from dom_snapshot import capture_snapshot, detect_ads_in_snapshot
+from result_cache import ResultCache, hash_ad_data
+from creative_index import CreativeIndex
+from metrics import REGISTRY, timed
+from ml_model import TrainingSession, AdRatingModel, summarize_ad_data
+
+# Common ad selectors used by detect_ad_content
+AD_SELECTOR = "[class*='ad'], [id*='ad'], [class*='advertisement'], iframe[src*='ad']"
+
+# Collects geometry, tag, media presence and text length for every ad
+# candidate in one round trip instead of several WebDriver calls per element
+AD_DETECTION_SCRIPT = """
+var nodes = document.querySelectorAll(arguments[0]);
+var scrollX = window.pageXOffset || 0;
+var scrollY = window.pageYOffset || 0;
+var results = [];
+for (var i = 0; i < nodes.length; i++) {
+    var el = nodes[i];
+    var rect = el.getBoundingClientRect();
+    results.push({
+        x: Math.round(rect.left + scrollX),
+        y: Math.round(rect.top + scrollY),
+        width: Math.round(rect.width),
+        height: Math.round(rect.height),
+        tag: el.tagName.toLowerCase(),
+        has_video: el.querySelector('video') !== null,
+        has_image: el.querySelector('img') !== null,
+        text_length: (el.textContent || '').trim().length
+    });
+}
+return results;
+"""
+
+# Installs a DOM mutation counter on first use and returns the state that
+# decides whether a cached frame is still current
+FRAME_STATE_SCRIPT = """
+if (window.__adAgentMutations === undefined) {
+    window.__adAgentMutations = 0;
+    new MutationObserver(function (records) {
+        window.__adAgentMutations += records.length;
+    }).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+return [location.href, window.pageXOffset, window.pageYOffset,
+        window.innerWidth, window.innerHeight, window.__adAgentMutations];
+"""
+
+# URL patterns passed to Network.setBlockedURLs for each blockable resource type;
+# the trailing wildcard also matches URLs with query strings
+BLOCKED_RESOURCE_PATTERNS = {
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.ogg*', '*.ogv*', '*.mp3*', '*.m4a*', '*.m3u8*', '*.mpd*'],
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'stylesheet': ['*.css*']
+}
+
+# Named chrome_options presets selected with chrome_options['launch_profile'].
+# "scoring" is for bulk navigate -> detect -> predict: no window, GPU, fonts,
+# media or image decoding, and navigation returns once the DOM is parsed and
+# ad candidates are present instead of waiting for the full load. Screenshots
+# and template matching see blank images under it.
+LAUNCH_PROFILES = {
+    'default': {},
+    'scoring': {
+        'headless': True,
+        'page_load_strategy': 'eager',
+        'disable_gpu': True,
+        'disable_images': True,
+        'mute_audio': True,
+        'blocked_resource_types': ['font', 'media'],
+        'wait_for_selector': AD_SELECTOR,
+        'wait_timeout': 2.0,
+        'page_load_timeout': 30
+    }
+}
+
+def resolve_launch_options(chrome_options=None):
+    """Merge the named launch profile with explicit chrome_options, explicit keys winning"""
+    chrome_options = dict(chrome_options or {})
+    name = chrome_options.pop('launch_profile', 'default')
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile: {name}")
+    return dict(LAUNCH_PROFILES[name], **chrome_options)
+
+def blocked_url_patterns(chrome_options):
+    """URL patterns to block for the configured resource types and extra URLs"""
+    patterns = []
+    for resource_type in chrome_options.get('blocked_resource_types', []):
+        if resource_type not in BLOCKED_RESOURCE_PATTERNS:
+            raise ValueError(f"Unknown resource type to block: {resource_type}")
+        patterns.extend(BLOCKED_RESOURCE_PATTERNS[resource_type])
+    patterns.extend(chrome_options.get('blocked_urls', []))
+    return patterns
+
+def has_element_scores(ad_data):
+    """Whether every element of detect_ad_content output carries a score"""
+    elements = ad_data.get('elements') if ad_data else None
+    return elements is not None and all('score' in element for element in elements)
+
+# Per-element keys added by score_ad_elements
+SCORE_KEYS = ('score', 'creative_hash', 'creative_distance')
+
+def strip_element_scores(ad_data):
+    """Copy of detect_ad_content output without per-element scores"""
+    if 'elements' not in ad_data:
+        return ad_data
+    elements = [{key: value for key, value in element.items() if key not in SCORE_KEYS}
+                for element in ad_data['elements']]
+    return dict(ad_data, elements=elements)
 
 class WebAgent:
-    def __init__(self):
+    def __init__(self, compress_action_log=False):
         self.driver = None
         self.is_recording = False
-        self.actions_log = []
-        self.training_session = TrainingSession()
+        # Recorded actions are streamed to disk; only the current sequence stays in memory
+        self.action_log = None
+        self.compress_action_log = compress_action_log
+        # Last decoded frame, its cache key and the reusable decode buffer
+        self.frame_cache_key = None
+        self.frame_buffer = None
+        self.template_registry = TemplateRegistry()
+        # Optional per-URL prediction cache, see enable_result_cache
+        self.result_cache = None
+        # Optional perceptual-hash index of scored creatives, see enable_creative_index
+        self.creative_index = None
+        # Post-navigation wait used instead of a full page load, see LAUNCH_PROFILES
+        self.wait_for_selector = None
+        self.wait_timeout = 0
+        self.settle_time = 0
+        # In-page interaction listener, see enable_interaction_capture
+        self.interaction_capture = None
+        # Detect ads from one DOM snapshot of all frames instead of the injected script
+        self.snapshot_detection = False
         self.ad_rating_model = AdRatingModel()
+        self.training_session = TrainingSession(model=self.ad_rating_model)
         self.setup_logging()
 
     def setup_logging(self):
@@ -36,53 +166,88 @@ class WebAgent:
         )
 
     def initialize(self, chrome_options=None):
-        """Initialize the web browser with optional Chrome profile settings"""
+        """Initialize the web browser with optional Chrome profile and launch settings
+
+        chrome_options['launch_profile'] selects a preset from LAUNCH_PROFILES;
+        any other keys override the preset.
+        """
         try:
             service = Service(ChromeDriverManager().install())
             options = webdriver.ChromeOptions()
+            chrome_options = resolve_launch_options(chrome_options)
             
             if chrome_options:
                 if 'user_data_dir' in chrome_options:
                     options.add_argument(f"user-data-dir={chrome_options['user_data_dir']}")
                 if 'profile_directory' in chrome_options:
                     options.add_argument(f"profile-directory={chrome_options['profile_directory']}")
+                if chrome_options.get('headless'):
+                    options.add_argument("--headless=new")
+                if 'page_load_strategy' in chrome_options:
+                    options.page_load_strategy = chrome_options['page_load_strategy']
+                if chrome_options.get('disable_gpu'):
+                    options.add_argument("--disable-gpu")
+                if chrome_options.get('disable_images'):
+                    options.add_argument("--blink-settings=imagesEnabled=false")
+                if chrome_options.get('mute_audio'):
+                    options.add_argument("--mute-audio")
             
             # Add additional options for stability
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--remote-debugging-port=9222")
+            # Port 0 lets Chrome pick a free port so several browsers can run side by side
+            options.add_argument(f"--remote-debugging-port={chrome_options.get('remote_debugging_port', 9222)}")
             
             self.driver = webdriver.Chrome(service=service, options=options)
+            REGISTRY.instrument_driver(self.driver)
+
+            if 'page_load_timeout' in chrome_options:
+                self.driver.set_page_load_timeout(chrome_options['page_load_timeout'])
+            patterns = blocked_url_patterns(chrome_options)
+            if patterns:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            self.wait_for_selector = chrome_options.get('wait_for_selector')
+            self.wait_timeout = chrome_options.get('wait_timeout', 0)
+            self.settle_time = chrome_options.get('settle_time', 0)
             logging.info("Browser initialized successfully with custom profile")
         except Exception as e:
             logging.error(f"Failed to initialize browser: {str(e)}")
             raise
 
+    @property
+    def actions_log(self):
+        """Actions recorded in the current sequence"""
+        return self.training_session.current_sequence
+
     def start_recording(self):
         """Start recording user actions"""
+        if self.action_log is None:
+            log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+            self.action_log = ActionLogWriter(action_log_path(log_dir, self.compress_action_log))
         self.is_recording = True
         logging.info("Started recording user actions")
 
     def stop_recording(self):
         """Stop recording user actions"""
+        self.poll_interactions(flush=True)
         self.is_recording = False
         self.save_recorded_actions()
         logging.info("Stopped recording user actions")
 
     def save_recorded_actions(self):
-        """Save recorded actions to a JSON file"""
-        if not self.actions_log:
+        """Flush and close the streaming action log"""
+        if self.action_log is None:
             return
 
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        
-        filename = os.path.join(log_dir, f'actions_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-        with open(filename, 'w') as f:
-            json.dump(self.actions_log, f, indent=4)
-        
-        logging.info(f"Saved recorded actions to {filename}")
-        self.actions_log = []
+        self.action_log.close()
+        logging.info(f"Saved {self.action_log.count} recorded actions to {self.action_log.path}")
+        self.action_log = None
+
+    def reset_recording(self):
+        """Stop recording and clear the current sequence, keeping the log open"""
+        self.is_recording = False
+        self.training_session.start_sequence()
 
     def record_action(self, action_type, params=None):
         """Record an action if recording is enabled"""
@@ -92,20 +257,78 @@ class WebAgent:
                 'type': action_type,
                 'params': params or {}
             }
-            self.actions_log.append(action)
+            self.action_log.write(action)
             self.training_session.add_action(action)
             logging.info(f"Recorded action: {action_type}")
+            self.poll_interactions()
 
+    def enable_interaction_capture(self, interval=2.0):
+        """Capture clicks, scrolls, ad hovers and ad visibility made directly in the browser
+
+        A listener injected into every page buffers the events; they are
+        merged into the current sequence by poll_interactions at most once
+        per interval, on navigation and when recording stops.
+        """
+        try:
+            self.interaction_capture = InteractionCapture(self.driver, AD_SELECTOR, interval)
+            self.interaction_capture.install()
+            logging.info("Enabled in-page interaction capture")
+            return self.interaction_capture
+        except Exception as e:
+            logging.error(f"Failed to enable interaction capture: {str(e)}")
+            raise
+
+    def poll_interactions(self, flush=False):
+        """Drain buffered page events into the current sequence once the interval has passed
+
+        Events drained while not recording are discarded. Returns the number
+        of actions recorded.
+        """
+        capture = self.interaction_capture
+        if capture is None or not (flush or capture.due()):
+            return 0
+        try:
+            events = capture.drain(flush)
+        except Exception as e:
+            # The page may be mid-navigation; its events are picked up on the next drain
+            logging.warning(f"Failed to drain page interactions: {str(e)}")
+            return 0
+        if not self.is_recording or not events:
+            return 0
+
+        actions = events_to_actions(events)
+        for action in actions:
+            self.action_log.write(action)
+        self.training_session.merge_actions(actions)
+        logging.info(f"Recorded {len(actions)} page interactions")
+        return len(actions)
+
+    @timed('agent.navigate_to')
     def navigate_to(self, url):
         """Navigate to a specific URL"""
         try:
+            # Collect the outgoing page's events before it unloads
+            self.poll_interactions(flush=True)
             self.driver.get(url)
+            self._wait_for_page()
             self.record_action('navigate', {'url': url})
             logging.info(f"Navigated to {url}")
         except Exception as e:
             logging.error(f"Failed to navigate to {url}: {str(e)}")
             raise
 
+    def _wait_for_page(self):
+        """Wait for ad candidates and an optional settle time after navigation"""
+        if self.wait_for_selector and self.wait_timeout:
+            try:
+                WebDriverWait(self.driver, self.wait_timeout, poll_frequency=0.05).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.wait_for_selector)))
+            except TimeoutException:
+                # Pages without ads are still scored
+                logging.info(f"No element matched {self.wait_for_selector} within {self.wait_timeout}s")
+        if self.settle_time:
+            time.sleep(self.settle_time)
+
     def click(self, x, y):
         """Click at specific coordinates"""
         try:
@@ -120,7 +343,9 @@ class WebAgent:
     def scroll(self, direction='down', amount=300):
         """Scroll the page"""
         try:
-            scroll_script = f"window.scrollBy(0, {amount if direction == 'down' else -amount});"
+            # Moving the capture baseline keeps the listener from recording this scroll again
+            scroll_script = (f"window.scrollBy(0, {amount if direction == 'down' else -amount});"
+                             "if (window.__adAgentCapture) window.__adAgentCapture.lastScrollY = window.pageYOffset;")
             self.driver.execute_script(scroll_script)
             self.record_action('scroll', {'direction': direction, 'amount': amount})
             logging.info(f"Scrolled {direction} by {amount} pixels")
@@ -128,6 +353,7 @@ class WebAgent:
             logging.error(f"Failed to scroll {direction}: {str(e)}")
             raise
 
+    @timed('agent.capture_screenshot')
     def capture_screenshot(self, element=None):
         """Capture screenshot of the page or specific element"""
         try:
@@ -142,22 +368,93 @@ class WebAgent:
             logging.error(f"Failed to capture screenshot: {str(e)}")
             raise
 
-    def find_element_by_image(self, template_image):
+    def capture_creative(self, element):
+        """Capture one ad creative as an RGB array
+
+        element is a WebElement or a detect_ad_content element dict; the
+        latter is captured as a clip of the page at its position and size.
+        """
+        if not isinstance(element, dict):
+            return self.capture_screenshot(element)
+        clip = {key: element[key] for key in ('x', 'y', 'width', 'height')}
+        # The frame buffer is reused by the next capture
+        return self.capture_frame(clip=clip, use_cache=False, beyond_viewport=True).copy()
+
+    @timed('agent.capture_frame')
+    def capture_frame(self, clip=None, image_format='png', quality=80, use_cache=True, beyond_viewport=False):
+        """Capture the viewport or a clipped region through CDP as an RGB array
+
+        clip is a dict with x, y, width and height in CSS pixels. PNG frames
+        are encoded with Chrome's speed-optimized settings; 'jpeg' and
+        'webp' trade exactness for smaller, faster frames. The frame is
+        decoded into a buffer that the next capture reuses, so copy it to
+        keep it. With use_cache, the previous frame is returned while the
+        URL, scroll position, viewport size and DOM mutation count are
+        unchanged; canvas or video changes do not invalidate it.
+        beyond_viewport renders clips that lie outside the viewport.
+        """
+        try:
+            cache_key = None
+            if use_cache:
+                state = self.driver.execute_script(FRAME_STATE_SCRIPT)
+                cache_key = (tuple(state), tuple(sorted(clip.items())) if clip else None,
+                             image_format, quality)
+                if cache_key == self.frame_cache_key and self.frame_buffer is not None:
+                    return self.frame_buffer
+
+            params = {'format': image_format}
+            if image_format == 'png':
+                params['optimizeForSpeed'] = True
+            else:
+                params['quality'] = quality
+            if clip:
+                params['clip'] = dict(clip, scale=clip.get('scale', 1))
+            if beyond_viewport:
+                params['captureBeyondViewport'] = True
+            result = self.driver.execute_cdp_cmd('Page.captureScreenshot', params)
+
+            frame = self._decode_frame(result['data'])
+            self.frame_cache_key = cache_key
+            return frame
+        except Exception as e:
+            self.frame_cache_key = None
+            logging.error(f"Failed to capture frame: {str(e)}")
+            raise
+
+    def _decode_frame(self, data):
+        """Decode a base64 image straight into the reusable RGB frame buffer"""
+        encoded = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+        bgr = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        if self.frame_buffer is None or self.frame_buffer.shape != bgr.shape:
+            self.frame_buffer = np.empty_like(bgr)
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self.frame_buffer)
+
+    def find_element_by_image(self, template_image, threshold=0.8):
         """Find an element on the page using template matching"""
         try:
-            screenshot = self.capture_screenshot()
-            template = cv2.imread(template_image)
-            
-            result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            if max_val > 0.8:  # Threshold for match confidence
-                return max_loc
+            hits = self.find_elements_by_images([template_image], threshold)
+            if hits:
+                return (hits[0]['x'], hits[0]['y'])
             return None
         except Exception as e:
             logging.error(f"Failed to find element by image: {str(e)}")
             raise
 
+    @timed('agent.find_elements_by_images')
+    def find_elements_by_images(self, template_images, threshold=0.8):
+        """Find every match of several template images in one screenshot
+
+        Templates are loaded and preprocessed once by the agent's
+        TemplateRegistry. Returns hit dicts (name, x, y, width, height,
+        score, scale) after non-maximum suppression, best first.
+        """
+        try:
+            names = [self.template_registry.ensure(path) for path in template_images]
+            return self.template_registry.match(self.capture_frame(), threshold, names=names)
+        except Exception as e:
+            logging.error(f"Failed to find elements by image: {str(e)}")
+            raise
+
     def get_page_text(self):
         """Extract all text content from the page"""
         try:
@@ -173,6 +470,11 @@ class WebAgent:
                 self.driver.quit()
             if self.is_recording:
                 self.stop_recording()
+            self.save_recorded_actions()
+            if self.result_cache:
+                self.result_cache.save()
+            if self.creative_index:
+                self.creative_index.save()
             logging.info("Browser closed successfully")
         except Exception as e:
             logging.error(f"Failed to close browser: {str(e)}")
@@ -192,47 +494,264 @@ class WebAgent:
         """Train the model on collected sequences"""
         return self.training_session.train_model()
 
+    def tune_model(self, space=None, folds=5, iterations=None, workers=None, path='models'):
+        """Cross-validated hyperparameter search over collected and stored sequences"""
+        return self.training_session.tune_model(space, folds, iterations, workers, path)
+
+    def enable_online_learning(self, batch_size=1, checkpoint_every=50, checkpoint_path='models'):
+        """Update the model from each rating instead of full retrains"""
+        self.training_session.enable_online_learning(batch_size, checkpoint_every, checkpoint_path)
+
+    def finish_online_learning(self):
+        """Apply pending online updates and save the updated model"""
+        return self.training_session.finish_online_learning()
+
     def predict_rating(self):
         """Predict rating based on current action sequence"""
         if not self.actions_log:
             return None
         return self.ad_rating_model.predict(self.actions_log)
 
-    def detect_ad_content(self):
-        """Detect and analyze ad content on the page"""
-        try:
-            # Find common ad selectors
-            ad_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                "[class*='ad'], [id*='ad'], [class*='advertisement'], iframe[src*='ad']")
-            
-            ad_data = {
-                'count': len(ad_elements),
-                'positions': [],
-                'types': []
-            }
+    def predict_ratings(self, action_sequences):
+        """Predict ratings for many action sequences in one batch"""
+        return self.ad_rating_model.predict_batch(action_sequences)
 
-            for element in ad_elements:
+    def score_ad_elements(self, ad_data):
+        """Attach a predicted rating to every element of detect_ad_content output
+
+        Each element is scored in the context of the current sequence, all in
+        one batch. Returns the scores in element order.
+        """
+        elements = ad_data.get('elements')
+        if elements is None:
+            # The per-element path keeps only positions and types
+            elements = [dict(position, type=ad_type)
+                        for position, ad_type in zip(ad_data['positions'], ad_data['types'])]
+            ad_data['elements'] = elements
+        if self.creative_index:
+            return self._score_ad_elements_indexed(elements)
+        features = self.ad_rating_model.element_features(self.actions_log, elements)
+        scores = self.ad_rating_model.predict_batch(features=features).tolist()
+        for element, score in zip(elements, scores):
+            element['score'] = score
+        return scores
+
+    def _score_ad_elements_indexed(self, elements):
+        """Reuse scores of creatives already in the creative index and score the rest in one batch
+
+        A reused score is the one from the visit that first indexed the
+        creative, so it does not reflect the current sequence.
+        """
+        unscored = []
+        for element in elements:
+            creative_hash = None
+            if element.get('width', 0) > 0 and element.get('height', 0) > 0:
                 try:
-                    location = element.location
-                    ad_data['positions'].append(location)
-                    
-                    # Determine ad type
-                    if element.tag_name == 'iframe':
-                        ad_data['types'].append('iframe')
-                    elif element.find_elements(By.TAG_NAME, 'video'):
-                        ad_data['types'].append('video')
-                    elif element.find_elements(By.TAG_NAME, 'img'):
-                        ad_data['types'].append('image')
-                    else:
-                        ad_data['types'].append('text')
-                except:
+                    creative_hash = self.creative_index.hash_image(self.capture_creative(element))
+                except Exception as e:
+                    logging.error(f"Failed to capture ad creative: {str(e)}")
+            if creative_hash is not None:
+                element['creative_hash'] = f'{creative_hash:016x}'
+                cached, distance = self.creative_index.lookup(creative_hash)
+                if cached is not None:
+                    element['score'] = cached['score']
+                    element['creative_distance'] = distance
                     continue
+            unscored.append((element, creative_hash))
+
+        if unscored:
+            batch = [element for element, _ in unscored]
+            features = self.ad_rating_model.element_features(self.actions_log, batch)
+            scores = self.ad_rating_model.predict_batch(features=features).tolist()
+            # One WebDriver round trip for the whole batch
+            indexed = any(creative_hash is not None for _, creative_hash in unscored)
+            page_url = self.driver.current_url if indexed else None
+            for (element, creative_hash), score in zip(unscored, scores):
+                element['score'] = score
+                if creative_hash is not None:
+                    self.creative_index.add(creative_hash, {
+                        'score': score,
+                        'type': element.get('type'),
+                        'width': element.get('width'),
+                        'height': element.get('height'),
+                        'url': page_url
+                    })
+        return [element['score'] for element in elements]
+
+    def enable_creative_index(self, path=None, max_distance=6, hash_function='dhash', index=None):
+        """Reuse element scores for creatives perceptually close to ones scored before
+
+        Pass index to share one CreativeIndex between agents.
+        """
+        self.creative_index = index or CreativeIndex(path, max_distance, hash_function)
+        return self.creative_index
+
+    def enable_result_cache(self, max_entries=1024, ttl=3600, path=None, cache=None):
+        """Cache predict_url results per URL; pass cache to share one between agents"""
+        self.result_cache = cache or ResultCache(max_entries, ttl, path)
+        return self.result_cache
+
+    @contextmanager
+    def preserved_recording(self):
+        """Set the current sequence and recording state aside for a with-block, then restore them
+
+        Lets predict_url score pages in the middle of a training sequence
+        without discarding it.
+        """
+        saved = list(self.actions_log)
+        was_recording = self.is_recording
+        try:
+            yield
+        finally:
+            self.training_session.current_sequence = saved
+            self.is_recording = was_recording
+
+    @timed('agent.predict_url')
+    def predict_url(self, url, score_elements=False):
+        """Navigate to a URL, detect its ads and predict a rating for the visit
 
-            return ad_data
+        With a result cache, a recently scored URL is returned without
+        loading the page, and an expired entry is reused when the detected
+        ads hash to the same content. Entries from another model version
+        are ignored. score_elements also scores every detected ad (see
+        score_ad_elements). The current sequence is discarded; see
+        preserved_recording.
+        """
+        def usable(cached):
+            return cached is not None and (not score_elements or has_element_scores(cached['ad_data']))
+
+        if self.result_cache:
+            cached = self.result_cache.get(url, self.ad_rating_model.version)
+            if usable(cached):
+                return dict(cached, cached=True)
+
+        self.reset_recording()
+        self.start_recording()
+        self.navigate_to(url)
+        ad_data = self.detect_ad_content(score_elements=score_elements)
+
+        content_hash = None
+        if self.result_cache and ad_data is not None:
+            # Scores are excluded so scored and unscored visits share a hash
+            content_hash = hash_ad_data(strip_element_scores(ad_data))
+            cached = self.result_cache.get_by_content(url, content_hash, self.ad_rating_model.version)
+            if usable(cached):
+                return dict(cached, cached=True)
+
+        prediction = self.predict_rating()
+        result = {
+            'url': url,
+            'prediction': float(prediction) if prediction is not None else None,
+            'ad_data': ad_data
+        }
+        if content_hash is not None:
+            self.result_cache.put(url, content_hash, result, self.ad_rating_model.version)
+        return dict(result, cached=False)
+
+    @timed('agent.detect_ad_content')
+    def detect_ad_content(self, single_pass=True, score_elements=False, snapshot=None):
+        """Detect and analyze ad content on the page
+
+        With single_pass enabled all candidates are measured by one injected
+        script; otherwise each element is queried through WebDriver.
+        snapshot (default: self.snapshot_detection) instead runs the same
+        heuristics in Python over one DOM snapshot, which also covers
+        iframes and shadow roots. score_elements adds a predicted 'score'
+        to every element.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot_detection
+        try:
+            if snapshot:
+                ad_data = self._detect_ad_content_snapshot()
+            elif single_pass:
+                ad_data = self._detect_ad_content_single_pass()
+            else:
+                ad_data = self._detect_ad_content_per_element()
+
+            # Make the page's ad context available to feature extraction
+            self.record_action('detect_ads', summarize_ad_data(ad_data))
         except Exception as e:
             logging.error(f"Failed to detect ad content: {str(e)}")
             return None
 
+        if score_elements:
+            try:
+                self.score_ad_elements(ad_data)
+            except Exception as e:
+                # Detection results stay usable without scores, e.g. before a model is trained
+                logging.error(f"Failed to score ad elements: {str(e)}")
+        return ad_data
+
+    def _detect_ad_content_per_element(self):
+        """Query every ad candidate through separate WebDriver calls"""
+        # Find common ad selectors
+        ad_elements = self.driver.find_elements(By.CSS_SELECTOR, AD_SELECTOR)
+        
+        ad_data = {
+            'count': len(ad_elements),
+            'positions': [],
+            'types': []
+        }
+
+        for element in ad_elements:
+            try:
+                location = element.location
+                ad_data['positions'].append(location)
+                
+                # Determine ad type
+                if element.tag_name == 'iframe':
+                    ad_data['types'].append('iframe')
+                elif element.find_elements(By.TAG_NAME, 'video'):
+                    ad_data['types'].append('video')
+                elif element.find_elements(By.TAG_NAME, 'img'):
+                    ad_data['types'].append('image')
+                else:
+                    ad_data['types'].append('text')
+            except:
+                continue
+
+        return ad_data
+
+    def _detect_ad_content_single_pass(self):
+        """Collect all ad candidates with a single execute_script call"""
+        elements = self.driver.execute_script(AD_DETECTION_SCRIPT, AD_SELECTOR) or []
+        return self._ad_data_from_elements(elements)
+
+    def _detect_ad_content_snapshot(self):
+        """Collect ad candidates in every frame from a single DOMSnapshot call"""
+        with REGISTRY.timer('agent.capture_dom_snapshot'):
+            snapshot = capture_snapshot(self.driver)
+        with REGISTRY.timer('agent.snapshot_heuristics'):
+            elements = detect_ads_in_snapshot(snapshot)
+        return self._ad_data_from_elements(elements)
+
+    def _ad_data_from_elements(self, elements):
+        """Classify measured candidates and build detect_ad_content output"""
+        ad_data = {
+            'count': len(elements),
+            'positions': [],
+            'types': [],
+            'elements': []
+        }
+
+        for element in elements:
+            if element['tag'] == 'iframe':
+                ad_type = 'iframe'
+            elif element['has_video']:
+                ad_type = 'video'
+            elif element['has_image']:
+                ad_type = 'image'
+            else:
+                ad_type = 'text'
+
+            element['type'] = ad_type
+            ad_data['positions'].append({'x': element['x'], 'y': element['y']})
+            ad_data['types'].append(ad_type)
+            ad_data['elements'].append(element)
+
+        return ad_data
+
     def save_training_data(self, path='training_data'):
         """Save collected training data"""
         self.training_session.save_training_data(path)
@@ -0,0 +1,179 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from agent import WebAgent
+
+class WebAgentPool:
+    """Keeps N warm headless WebAgents and leases them to callers"""
+
+    def __init__(self, size=None, chrome_options=None, max_uses=50, model_path=None, result_cache=None,
+                 snapshot_detection=False, creative_index=None, lite_model=False, relaunch_attempts=2):
+        self.size = size or os.cpu_count() or 1
+        self.chrome_options = dict(chrome_options or {})
+        self.chrome_options.setdefault('headless', True)
+        # Let every browser pick its own debugging port
+        self.chrome_options.setdefault('remote_debugging_port', 0)
+        self.max_uses = max_uses
+        # Launches tried before a recycled browser is given up on
+        self.relaunch_attempts = relaunch_attempts
+        self.model_path = model_path
+        # Serve model_path's TFLite artifact instead of loading TensorFlow/Keras per browser
+        self.lite_model = lite_model
+        # Optional ResultCache shared by every pooled agent
+        self.result_cache = result_cache
+        # Passed to every agent, see WebAgent.detect_ad_content
+        self.snapshot_detection = snapshot_detection
+        # Optional CreativeIndex shared by every pooled agent
+        self.creative_index = creative_index
+        self._idle = queue.Queue()
+        self._agents = []
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Launch all browsers in parallel
+
+        If any launch fails, the browsers that did start are closed before
+        the error is re-raised.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=self.size) as executor:
+                agents = list(executor.map(lambda _: self._create_agent(), range(self.size)))
+        except Exception:
+            with self._lock:
+                launched = list(self._agents)
+            for agent in launched:
+                self._discard_agent(agent)
+            raise
+        for agent in agents:
+            self._idle.put(agent)
+        logging.info(f"Agent pool started with {self.size} browsers")
+        return self
+
+    def _create_agent(self):
+        """Create and initialize a single pooled agent"""
+        agent = WebAgent()
+        agent.snapshot_detection = self.snapshot_detection
+        agent.initialize(chrome_options=self.chrome_options)
+        try:
+            if self.model_path and not agent.ad_rating_model.load(self.model_path, lite=self.lite_model):
+                raise RuntimeError(f"Failed to load model from {self.model_path}")
+        except Exception:
+            agent.close()
+            raise
+        if self.result_cache:
+            agent.enable_result_cache(cache=self.result_cache)
+        if self.creative_index:
+            agent.enable_creative_index(index=self.creative_index)
+        with self._lock:
+            self._agents.append(agent)
+            self._uses[id(agent)] = 0
+        return agent
+
+    def _discard_agent(self, agent):
+        """Close an agent and forget about it"""
+        with self._lock:
+            if agent in self._agents:
+                self._agents.remove(agent)
+            self._uses.pop(id(agent), None)
+        try:
+            agent.close()
+        except Exception as e:
+            logging.error(f"Failed to close pooled agent: {str(e)}")
+
+    def is_healthy(self, agent):
+        """Check that the agent's browser still answers scripts"""
+        try:
+            return agent.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _release(self, agent):
+        """Reset a leased agent and hand it back, recycling it if needed"""
+        agent.reset_recording()
+        with self._lock:
+            self._uses[id(agent)] = self._uses.get(id(agent), 0) + 1
+            uses = self._uses[id(agent)]
+
+        if self._closed:
+            self._discard_agent(agent)
+            return
+
+        if uses >= self.max_uses or not self.is_healthy(agent):
+            logging.info(f"Recycling pooled agent after {uses} uses")
+            agent = self._replace_agent(agent)
+            if agent is None:
+                with self._lock:
+                    exhausted = not self._agents
+                if exhausted:
+                    logging.error("Agent pool has no browsers left")
+                    # Wake callers blocked in lease() instead of leaving them waiting forever
+                    self._idle.put(None)
+                return
+        self._idle.put(agent)
+
+    def _replace_agent(self, agent):
+        """Discard an agent and launch its replacement, or return None if every attempt fails"""
+        self._discard_agent(agent)
+        for attempt in range(1, self.relaunch_attempts + 1):
+            try:
+                return self._create_agent()
+            except Exception as e:
+                logging.error(f"Failed to replace pooled agent (attempt {attempt}): {str(e)}")
+        return None
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Borrow an idle agent for the duration of a with-block"""
+        if self._closed:
+            raise RuntimeError("Agent pool is closed")
+        agent = self._idle.get(timeout=timeout)
+        if agent is None:
+            # Pass the wake-up on to the next waiting caller
+            self._idle.put(None)
+            raise RuntimeError("Agent pool is closed" if self._closed else "Agent pool has no browsers left")
+        try:
+            yield agent
+        finally:
+            self._release(agent)
+
+    def predict_url(self, url, score_elements=False):
+        """Score a single URL on a leased agent"""
+        with self.lease() as agent:
+            try:
+                result = agent.predict_url(url, score_elements)
+                result['error'] = None
+            except Exception as e:
+                logging.error(f"Failed to predict {url}: {str(e)}")
+                result = {'url': url, 'prediction': None, 'ad_data': None, 'cached': False, 'error': str(e)}
+        return result
+
+    def predict_urls(self, urls, score_elements=False):
+        """Fan URLs out across the pool, yielding each result as soon as it finishes"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self.predict_url, url, score_elements) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        """Close idle browsers; leased ones are closed when they are released"""
+        self._closed = True
+        while True:
+            try:
+                agent = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if agent is not None:
+                self._discard_agent(agent)
+        self._idle.put(None)
+        logging.info("Agent pool closed")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
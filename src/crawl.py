@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from urllib.parse import urlsplit
+
+def url_domain(url):
+    """Host (and port) a URL is rate limited by"""
+    return urlsplit(url).netloc.lower()
+
+def read_url_list(path):
+    """Read one URL per line, skipping blanks and # comments"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+class CrawlQueue:
+    """Append-only JSON Lines checkpoint of finished crawl URLs
+
+    Every finished attempt is one line, written and fsynced before the
+    next URL of that worker starts, so a restarted crawl skips URLs that
+    are done and retries failed ones until max_attempts is reached. A
+    line cut short by a crash is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.attempts = Counter()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.attempts[entry['url']] += 1
+                if entry['status'] == 'done':
+                    self.done.add(entry['url'])
+
+    def pending(self, urls, max_attempts=2):
+        """URLs still to crawl, in list order and without duplicates"""
+        return [url for url in OrderedDict.fromkeys(urls)
+                if url not in self.done and self.attempts[url] < max_attempts]
+
+    def record(self, url, status):
+        """Checkpoint one finished attempt ('done' or 'failed')"""
+        line = json.dumps({'url': url, 'status': status, 'time': time.time()}, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.attempts[url] += 1
+            if status == 'done':
+                self.done.add(url)
+
+    def close(self):
+        self._file.close()
+
+class CrawlScheduler:
+    """Scores URL lists on a WebAgentPool with per-domain concurrency and politeness limits
+
+    At most per_domain URLs of one domain are in flight at once, and
+    starts on the same domain are at least domain_delay seconds apart.
+    Domains are served round-robin, so one large publisher does not
+    hold up the rest of the list while workers are free.
+    """
+
+    def __init__(self, pool, per_domain=2, domain_delay=1.0, max_attempts=2, workers=None):
+        self.pool = pool
+        self.per_domain = per_domain
+        self.domain_delay = domain_delay
+        self.max_attempts = max_attempts
+        self.workers = workers or pool.size
+        self._condition = threading.Condition()
+        self._queues = OrderedDict()
+        self._active = Counter()
+        self._next_start = {}
+        self._results_lock = threading.Lock()
+        self.counters = Counter()
+
+    def _enqueue(self, url):
+        self._queues.setdefault(url_domain(url), deque()).append(url)
+
+    def _next_url(self):
+        """Block until some domain may start another URL; None once the queue is drained"""
+        with self._condition:
+            while True:
+                if not self._queues:
+                    if not sum(self._active.values()):
+                        return None
+                    # A running URL may fail and be queued for retry
+                    self._condition.wait()
+                    continue
+
+                now = time.monotonic()
+                wake = None
+                for domain in list(self._queues):
+                    if self._active[domain] >= self.per_domain:
+                        continue
+                    start = self._next_start.get(domain, 0.0)
+                    if start > now:
+                        wake = start if wake is None else min(wake, start)
+                        continue
+                    urls = self._queues.pop(domain)
+                    url = urls.popleft()
+                    # Move the domain to the back for round-robin
+                    if urls:
+                        self._queues[domain] = urls
+                    self._active[domain] += 1
+                    self._next_start[domain] = now + self.domain_delay
+                    return url
+                self._condition.wait(None if wake is None else wake - now)
+
+    def _finish(self, url, status, retry):
+        with self._condition:
+            self.counters[status] += 1
+            domain = url_domain(url)
+            self._active[domain] -= 1
+            if retry:
+                self._enqueue(url)
+            self._condition.notify_all()
+
+    def _worker(self, queue, results, score_elements):
+        while True:
+            url = self._next_url()
+            if url is None:
+                return
+            start = time.perf_counter()
+            try:
+                result = self.pool.predict_url(url, score_elements)
+            except Exception as e:
+                logging.error(f"Failed to crawl {url}: {str(e)}")
+                result = {'url': url, 'prediction': None, 'ad_data': None, 'cached': False, 'error': str(e)}
+            result['seconds'] = time.perf_counter() - start
+            failed = result.get('error') is not None
+            status = 'failed' if failed else 'done'
+            result['attempt'] = queue.attempts[url] + 1
+
+            # Results are on disk before the checkpoint, so a crash can repeat a line but not lose one
+            line = json.dumps(result, separators=(',', ':'), default=str) + '\n'
+            with self._results_lock:
+                results.write(line)
+                results.flush()
+            queue.record(url, status)
+            self._finish(url, status, failed and queue.attempts[url] < self.max_attempts)
+
+    def run(self, urls, queue_path, results_path, score_elements=False):
+        """Crawl every pending URL and stream results to results_path as JSON Lines
+
+        Returns counts of done and failed attempts, URLs skipped because an
+        earlier run finished them, elapsed seconds and done URLs per minute.
+        """
+        queue = CrawlQueue(queue_path)
+        pending = queue.pending(urls, self.max_attempts)
+        skipped = len(OrderedDict.fromkeys(urls)) - len(pending)
+        for url in pending:
+            self._enqueue(url)
+        logging.info(f"Crawling {len(pending)} URLs across {len(self._queues)} domains "
+                     f"({skipped} done or out of attempts) with {self.workers} workers")
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+        try:
+            with open(results_path, 'a', encoding='utf-8') as results:
+                threads = [threading.Thread(target=self._worker, args=(queue, results, score_elements),
+                                            name=f"crawl-{i}", daemon=True)
+                           for i in range(min(self.workers, len(pending)))]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            queue.close()
+
+        seconds = time.perf_counter() - start
+        summary = {
+            'done': self.counters['done'],
+            'failed': self.counters['failed'],
+            'skipped': skipped,
+            'seconds': seconds,
+            # Only completed URLs count towards throughput
+            'urls_per_minute': self.counters['done'] / seconds * 60 if seconds else 0.0
+        }
+        logging.info(f"Crawl finished: {summary}")
+        return summary
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from template_matching import to_gray
+
+def bits_to_int(bits):
+    """Pack a boolean array into an int, first element as the most significant bit"""
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big') >> (-len(bits) % 8)
+
+def dhash(image, size=8):
+    """Difference hash: signs of horizontal gradients on a (size+1) x size thumbnail"""
+    thumbnail = cv2.resize(to_gray(image), (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return bits_to_int(bits)
+
+def phash(image, size=8, scale=4):
+    """DCT hash: low-frequency coefficients of a 32x32 thumbnail against their median"""
+    side = size * scale
+    thumbnail = cv2.resize(to_gray(image), (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(thumbnail)[:size, :size].ravel()
+    # The DC term only reflects overall brightness
+    bits = low > np.median(low[1:])
+    return bits_to_int(bits)
+
+HASH_FUNCTIONS = {'dhash': dhash, 'phash': phash}
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes for Hamming-radius search
+
+    Each node keeps children keyed by their distance to it; by the
+    triangle inequality a search only descends into children whose key is
+    within radius of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value):
+        """Insert a hash"""
+        node = [value, {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[1].get(distance)
+            if child is None:
+                current[1][distance] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """Return (distance, hash) for every hash within radius, nearest first"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_value, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                found.append((distance, node_value))
+            for key, child in children.items():
+                if distance - radius <= key <= distance + radius:
+                    stack.append(child)
+        found.sort()
+        return found
+
+    def __len__(self):
+        return self.size
+
+class CreativeIndex:
+    """On-disk index from perceptual hashes of ad creatives to earlier results
+
+    A creative is a hit when some indexed hash is within max_distance bits
+    (Hamming distance) of its own, so recompressed, rescaled or slightly
+    edited copies of one creative share a single stored result.
+    """
+
+    def __init__(self, path=None, max_distance=6, hash_function='dhash'):
+        if hash_function not in HASH_FUNCTIONS:
+            raise ValueError(f"Unknown hash function: {hash_function}")
+        self.path = path
+        self.max_distance = max_distance
+        self.hash_function = hash_function
+        self.entries = {}
+        self.tree = BKTree()
+        self.counters = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def hash_image(self, image):
+        """Perceptual hash of an RGB(A) creative image, or None for a blank one
+
+        Blank captures (not yet loaded, hidden) would all share one hash.
+        """
+        if not image.size or image.min() == image.max():
+            return None
+        return HASH_FUNCTIONS[self.hash_function](image)
+
+    def lookup(self, creative_hash):
+        """Return (stored result, distance) of the nearest creative within max_distance, or (None, None)"""
+        with self._lock:
+            matches = self.tree.search(creative_hash, self.max_distance)
+            if not matches:
+                self.counters['misses'] += 1
+                return None, None
+            self.counters['hits'] += 1
+            distance, value = matches[0]
+            return self.entries[value]['result'], distance
+
+    def add(self, creative_hash, result):
+        """Store the result for a creative hash, replacing any entry with the exact same hash"""
+        with self._lock:
+            if creative_hash not in self.entries:
+                self.tree.add(creative_hash)
+            self.entries[creative_hash] = {'result': result, 'stored_at': time.time()}
+
+    def stats(self):
+        """Hit/miss counters plus current size"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return dict(
+                self.counters,
+                entries=len(self.entries),
+                max_distance=self.max_distance,
+                hash_function=self.hash_function,
+                hit_rate=self.counters['hits'] / lookups if lookups else 0.0
+            )
+
+    def save(self):
+        """Persist entries to path as JSON"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = [[f'{value:016x}', entry] for value, entry in self.entries.items()]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'hash_function': self.hash_function, 'entries': entries}, f, default=str)
+        os.replace(temporary, self.path)
+        logging.info(f"Saved {len(entries)} indexed creatives to {self.path}")
+
+    def load(self):
+        """Load persisted entries from path and rebuild the BK-tree"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load creative index {self.path}: {str(e)}")
+            return
+        if data.get('hash_function', self.hash_function) != self.hash_function:
+            logging.error(f"Creative index {self.path} uses {data['hash_function']} hashes, not {self.hash_function}")
+            return
+        with self._lock:
+            self.entries = {int(value, 16): entry for value, entry in data.get('entries', [])}
+            self.tree = BKTree()
+            for value in self.entries:
+                self.tree.add(value)
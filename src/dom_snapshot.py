@@ -0,0 +1,142 @@
+import numpy as np
+
+# Substring the ad heuristics look for, as in agent.AD_SELECTOR:
+# class or id containing it on any element, src containing it on iframes
+AD_MARKER = 'ad'
+
+TEXT_NODE = 3
+
+def capture_snapshot(driver):
+    """Capture every same-process frame and shadow tree with layout bounds in one CDP call"""
+    return driver.execute_cdp_cmd('DOMSnapshot.captureSnapshot', {
+        'computedStyles': [],
+        'includeDOMRects': True
+    })
+
+def ancestor_sums(parents, nodes, weights, size):
+    """Sum weights of nodes into every proper ancestor, one tree level per step"""
+    totals = np.zeros(size, dtype=np.float64)
+    while nodes.size:
+        nodes = parents[nodes]
+        keep = nodes >= 0
+        nodes, weights = nodes[keep], weights[keep]
+        np.add.at(totals, nodes, weights)
+    return totals
+
+def rare_integer_map(rare, size):
+    """Expand CDP RareIntegerData to a dense array, -1 where absent"""
+    dense = np.full(size, -1, dtype=np.int64)
+    if rare and rare['index']:
+        dense[np.asarray(rare['index'], dtype=np.int64)] = rare['value']
+    return dense
+
+class SnapshotIndex:
+    """Per-string lookups over the snapshot's shared string table
+
+    Strings are tested once each, so matching a node's attributes is
+    indexing into these arrays rather than string work per node.
+    """
+
+    def __init__(self, strings):
+        table = np.array(strings + [''], dtype=object)
+        self.strings = table
+        # Index -1 (no string) maps to the empty string appended above
+        self.has_marker = np.array([AD_MARKER in s for s in table], dtype=bool)
+        upper = np.array([s.upper() for s in table], dtype=object)
+        self.is_class_or_id = (upper == 'CLASS') | (upper == 'ID')
+        self.is_src = upper == 'SRC'
+        self.is_iframe = upper == 'IFRAME'
+        self.is_video = upper == 'VIDEO'
+        self.is_image = upper == 'IMG'
+        self.text_length = np.array([len(s.strip()) for s in table], dtype=np.float64)
+
+def document_offsets(documents):
+    """Page offset of every document, adding up the bounds of the iframes that hold it"""
+    offsets = [None] * len(documents)
+    children = {}
+    for d, document in enumerate(documents):
+        nodes = document['nodes']
+        size = len(nodes['parentIndex'])
+        content = rare_integer_map(nodes.get('contentDocumentIndex'), size)
+        bounds = dict(zip(document['layout']['nodeIndex'], document['layout']['bounds']))
+        for node in np.nonzero(content >= 0)[0].tolist():
+            x, y = bounds.get(node, (0, 0, 0, 0))[:2]
+            children.setdefault(d, []).append((int(content[node]), x, y))
+
+    nested = {child for entries in children.values() for child, _, _ in entries}
+    stack = [(d, 0.0, 0.0) for d in range(len(documents)) if d not in nested]
+    while stack:
+        d, x, y = stack.pop()
+        if offsets[d] is not None:
+            continue
+        offsets[d] = (x, y)
+        stack.extend((child, x + dx, y + dy) for child, dx, dy in children.get(d, []))
+    return [offset or (0.0, 0.0) for offset in offsets]
+
+def detect_ads_in_snapshot(snapshot):
+    """Run the ad heuristics over a DOMSnapshot.captureSnapshot result
+
+    Returns one dict per candidate with the same keys as the injected
+    detection script, plus the URL of the frame it was found in.
+    Coordinates are in main-page pixels. Unlike the CSS selector, this
+    sees into iframes and shadow roots. text_length adds up the trimmed
+    text nodes under the element, so whitespace between nodes is not
+    counted.
+    """
+    index = SnapshotIndex(snapshot['strings'])
+    offsets = document_offsets(snapshot['documents'])
+    elements = []
+
+    for d, document in enumerate(snapshot['documents']):
+        nodes = document['nodes']
+        parents = np.asarray(nodes['parentIndex'], dtype=np.int64)
+        size = len(parents)
+        if not size:
+            continue
+        names = np.asarray(nodes['nodeName'], dtype=np.int64)
+        node_types = np.asarray(nodes['nodeType'], dtype=np.int64)
+
+        # Flatten [name, value, name, value, ...] attribute lists into parallel arrays
+        attributes = nodes.get('attributes') or [[] for _ in range(size)]
+        counts = np.fromiter((len(a) // 2 for a in attributes), dtype=np.int64, count=size)
+        owners = np.repeat(np.arange(size), counts)
+        flat = np.fromiter((value for a in attributes for value in a), dtype=np.int64, count=int(counts.sum()) * 2)
+        attr_names, attr_values = flat[0::2], flat[1::2]
+
+        is_iframe = index.is_iframe[names]
+        matched = index.has_marker[attr_values] & (
+            index.is_class_or_id[attr_names] | (index.is_src[attr_names] & is_iframe[owners]))
+        candidates = np.unique(owners[matched])
+        if not candidates.size:
+            continue
+
+        videos = np.nonzero(index.is_video[names])[0]
+        images = np.nonzero(index.is_image[names])[0]
+        has_video = ancestor_sums(parents, videos, np.ones(videos.size), size) > 0
+        has_image = ancestor_sums(parents, images, np.ones(images.size), size) > 0
+        text_nodes = np.nonzero(node_types == TEXT_NODE)[0]
+        values = np.asarray(nodes.get('nodeValue') or np.full(size, -1), dtype=np.int64)[text_nodes]
+        text_length = ancestor_sums(parents, text_nodes, index.text_length[values], size)
+
+        layout = document['layout']
+        bounds = np.zeros((size, 4))
+        if layout['nodeIndex']:
+            bounds[np.asarray(layout['nodeIndex'], dtype=np.int64)] = np.asarray(layout['bounds'], dtype=np.float64)[:, :4]
+        x_offset, y_offset = offsets[d]
+        frame = index.strings[document['documentURL']]
+
+        for node in candidates.tolist():
+            x, y, width, height = bounds[node]
+            elements.append({
+                'x': int(round(x + x_offset)),
+                'y': int(round(y + y_offset)),
+                'width': int(round(width)),
+                'height': int(round(height)),
+                'tag': index.strings[names[node]].lower(),
+                'has_video': bool(has_video[node]),
+                'has_image': bool(has_image[node]),
+                'text_length': int(text_length[node]),
+                'frame': frame
+            })
+
+    return elements
@@ -0,0 +1,180 @@
+import json
+import time
+from datetime import datetime
+
+# Installed into every document. Buffers trusted clicks, coalesced scrolls and
+# per-ad hover and visibility intervals in window.__adAgentCapture until the
+# agent drains them; the buffer survives same-origin navigations through
+# sessionStorage.
+CAPTURE_FUNCTION = """
+function (selector) {
+    if (window.__adAgentCapture) return;
+    var capture = {events: [], lastScrollY: window.pageYOffset || 0};
+    window.__adAgentCapture = capture;
+    try {
+        var saved = sessionStorage.getItem('__adAgentEvents');
+        if (saved) {
+            capture.events = JSON.parse(saved);
+            sessionStorage.removeItem('__adAgentEvents');
+        }
+    } catch (e) {}
+
+    var ids = new WeakMap();
+    var nextId = 0;
+    var hovered = new Map();
+    var visible = new Map();
+    var scrollTimer = null;
+
+    function push(event) {
+        event.t = Date.now();
+        capture.events.push(event);
+    }
+    function adOf(node) {
+        return node && node.nodeType === 1 ? node.closest(selector) : null;
+    }
+    function adId(ad) {
+        if (!ids.has(ad)) ids.set(ad, nextId++);
+        return ids.get(ad);
+    }
+    function endInterval(intervals, ad, type) {
+        var start = intervals.get(ad);
+        if (start === undefined) return;
+        intervals.delete(ad);
+        push({type: type, ad: adId(ad), duration: Date.now() - start});
+    }
+    function splitIntervals(intervals, type) {
+        var now = Date.now();
+        intervals.forEach(function (start, ad) {
+            push({type: type, ad: adId(ad), duration: now - start});
+            intervals.set(ad, now);
+        });
+    }
+    function flushScroll() {
+        scrollTimer = null;
+        var y = window.pageYOffset;
+        var delta = y - capture.lastScrollY;
+        capture.lastScrollY = y;
+        if (delta) push({type: 'scroll', amount: Math.abs(delta), direction: delta > 0 ? 'down' : 'up'});
+    }
+
+    document.addEventListener('click', function (e) {
+        // Clicks issued by WebAgent.click are untrusted and recorded by the agent itself
+        if (!e.isTrusted) return;
+        var ad = adOf(e.target);
+        push({type: 'click', x: Math.round(e.clientX), y: Math.round(e.clientY), ad: ad ? adId(ad) : -1});
+    }, true);
+    window.addEventListener('scroll', function () {
+        if (scrollTimer === null) scrollTimer = setTimeout(flushScroll, 250);
+    }, {capture: true, passive: true});
+    document.addEventListener('mouseover', function (e) {
+        var ad = adOf(e.target);
+        if (ad && !hovered.has(ad)) hovered.set(ad, Date.now());
+    }, true);
+    document.addEventListener('mouseout', function (e) {
+        var ad = adOf(e.target);
+        if (ad && !(e.relatedTarget && ad.contains(e.relatedTarget))) endInterval(hovered, ad, 'hover');
+    }, true);
+
+    var observer = window.IntersectionObserver ? new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                if (!visible.has(entry.target)) visible.set(entry.target, Date.now());
+            } else {
+                endInterval(visible, entry.target, 'ad_visible');
+            }
+        });
+    }, {threshold: 0.5}) : null;
+    var observed = new WeakSet();
+    function observeAds() {
+        if (!observer || !document.documentElement) return;
+        var nodes = document.querySelectorAll(selector);
+        for (var i = 0; i < nodes.length; i++) {
+            if (!observed.has(nodes[i])) {
+                observed.add(nodes[i]);
+                observer.observe(nodes[i]);
+            }
+        }
+    }
+
+    capture.drain = function (flush) {
+        observeAds();
+        if (flush) {
+            if (scrollTimer !== null) {
+                clearTimeout(scrollTimer);
+                flushScroll();
+            }
+            splitIntervals(hovered, 'hover');
+            splitIntervals(visible, 'ad_visible');
+        }
+        var events = capture.events;
+        capture.events = [];
+        return events;
+    };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', observeAds);
+    } else {
+        observeAds();
+    }
+    window.addEventListener('pagehide', function () {
+        try {
+            sessionStorage.setItem('__adAgentEvents', JSON.stringify(capture.drain(true)));
+        } catch (e) {}
+    });
+}
+"""
+
+DRAIN_SCRIPT = "return window.__adAgentCapture ? window.__adAgentCapture.drain(arguments[0]) : [];"
+
+class InteractionCapture:
+    """In-page listener for user interactions with ad elements
+
+    Events are buffered inside the page and fetched with a single
+    execute_script call per drain, so capturing adds no WebDriver traffic
+    between drains.
+    """
+
+    def __init__(self, driver, selector, interval=2.0):
+        self.driver = driver
+        self.selector = selector
+        self.interval = interval
+        self.script_id = None
+        self.last_drain = 0.0
+        self.drained_events = 0
+
+    def install(self):
+        """Inject the listener into the current page and every page loaded after it"""
+        source = f"({CAPTURE_FUNCTION})({json.dumps(self.selector)});"
+        result = self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': source})
+        self.script_id = result.get('identifier')
+        self.driver.execute_script(source)
+        self.last_drain = time.monotonic()
+
+    def uninstall(self):
+        """Stop injecting the listener into new pages"""
+        if self.script_id is not None:
+            self.driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument',
+                                        {'identifier': self.script_id})
+            self.script_id = None
+
+    def due(self):
+        """Whether the drain interval has passed"""
+        return time.monotonic() - self.last_drain >= self.interval
+
+    def drain(self, flush=False):
+        """Fetch and clear buffered events; flush also closes open hover/visibility intervals"""
+        events = self.driver.execute_script(DRAIN_SCRIPT, flush) or []
+        self.last_drain = time.monotonic()
+        self.drained_events += len(events)
+        return events
+
+def events_to_actions(events):
+    """Convert drained page events into recorded action dicts"""
+    actions = []
+    for event in events:
+        event_type = event.pop('type')
+        timestamp = datetime.fromtimestamp(event.pop('t') / 1000).isoformat()
+        if event_type in ('click', 'scroll'):
+            event['source'] = 'page'
+        actions.append({'timestamp': timestamp, 'type': event_type, 'params': event})
+    return actions
@@ -0,0 +1,101 @@
+import argparse
+import logging
+import numpy as np
+
+# Quantization modes accepted by export_tflite; None keeps float32 weights
+QUANTIZATIONS = ('float16', 'int8', None)
+
+# TensorFlow ops for the activations used by AdRatingModel.setup_model
+TF_ACTIVATIONS = {'relu': 'relu', 'sigmoid': 'sigmoid', 'linear': None}
+
+def export_tflite(layers, path, quantization='float16'):
+    """Convert exported (weights, bias, activation) layers into a TFLite flatbuffer
+
+    layers come from AdRatingModel.export_inference_layers, so the
+    scaler is already folded into the first layer and the artifact takes
+    unscaled feature rows. 'float16' stores half-precision weights;
+    'int8' is dynamic-range quantization (int8 weights, float activations).
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    constants = [(tf.constant(weights, tf.float32), tf.constant(bias, tf.float32), TF_ACTIVATIONS[activation])
+                 for weights, bias, activation in layers]
+
+    module = tf.Module()
+
+    @tf.function(input_signature=[tf.TensorSpec([None, layers[0][0].shape[0]], tf.float32)])
+    def serve(features):
+        output = features
+        for weights, bias, activation in constants:
+            output = tf.matmul(output, weights) + bias
+            if activation:
+                output = getattr(tf.nn, activation)(output)
+        return output
+
+    module.serve = serve
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], module)
+    if quantization:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    flatbuffer = converter.convert()
+    with open(path, 'wb') as f:
+        f.write(flatbuffer)
+    return path
+
+def load_interpreter(path):
+    """TFLite interpreter from tflite_runtime if installed, else from TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        logging.info("tflite_runtime not installed; using tf.lite (imports TensorFlow)")
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    interpreter = Interpreter(model_path=path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+class TFLitePredictor:
+    """Scores unscaled feature rows with an exported TFLite artifact
+
+    The input tensor is resized only when the batch size changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.interpreter = load_interpreter(path)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = None
+
+    def predict(self, features):
+        """Scores for a matrix of feature rows"""
+        features = np.asarray(features, dtype=np.float32)
+        if features.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, features.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = features.shape[0]
+        self.interpreter.set_tensor(self.input_index, features)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)[:, 0].astype(np.float64)
+
+def main():
+    from ml_model import AdRatingModel
+
+    parser = argparse.ArgumentParser(description='Export a saved AdRatingModel as a TFLite artifact')
+    parser.add_argument('model_path', nargs='?', default='models', help='Saved model directory')
+    parser.add_argument('--quantization', choices=['float16', 'int8', 'none'], default='float16',
+                        help='Weight precision; int8 is dynamic-range quantization')
+    args = parser.parse_args()
+
+    model = AdRatingModel()
+    if not model.load(args.model_path):
+        parser.error(f"No saved model could be loaded from {args.model_path}")
+    quantization = None if args.quantization == 'none' else args.quantization
+    path = model.export_lite(args.model_path, quantization)
+    print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    main()
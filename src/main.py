@@ -1,5 +1,8 @@
 import argparse
-from agent import WebAgent
+import os
+from agent import WebAgent, LAUNCH_PROFILES
+from metrics import REGISTRY
+from ml_model import LITE_MODEL_FILE
 import time
 import sys
 
@@ -10,11 +13,14 @@ def train_mode(agent, url):
         print("Navigate to ads and interact with them. Rate each ad sequence when done.")
         print("Commands: rate [0-1], next, done")
         
+        agent.enable_interaction_capture()
         agent.start_training_sequence()
         agent.navigate_to(url)
         
         while True:
             command = input("\nEnter command (rate [0-1], next, done): ").strip().lower()
+            # Pick up clicks, scrolls and ad views made in the browser while waiting
+            agent.poll_interactions()
             
             if command == 'done':
                 break
@@ -38,11 +44,16 @@ def train_mode(agent, url):
             else:
                 print("Unknown command")
         
-        # Train model with collected data
-        print("\nTraining model with collected sequences...")
-        history = agent.train_model()
-        if history:
-            print("Model trained successfully!")
+        if agent.training_session.online:
+            # The model was already updated after every rating; retraining would discard that
+            if agent.finish_online_learning():
+                print("\nOnline-updated model saved!")
+        else:
+            # Train model with collected data
+            print("\nTraining model with collected sequences...")
+            history = agent.train_model()
+            if history:
+                print("Model trained successfully!")
             
         # Save training data
         agent.save_training_data()
@@ -51,50 +62,137 @@ def train_mode(agent, url):
     except Exception as e:
         print(f"Error in training mode: {str(e)}")
 
-def predict_mode(agent, url):
+def predict_mode(agent, url, interactive=False):
     """Prediction mode for rating ads"""
     try:
         print("Starting prediction mode...")
-        agent.start_recording()
-        agent.navigate_to(url)
+        result = agent.predict_url(url)
+        if result['cached'] and interactive:
+            # A cached prediction does not load the page the follow-up scroll or click acts on
+            agent.navigate_to(url)
         
         # Detect ads
-        ad_data = agent.detect_ad_content()
+        ad_data = result['ad_data']
         if ad_data and ad_data['count'] > 0:
             print(f"\nFound {ad_data['count']} ads on the page")
             print("Types:", ', '.join(ad_data['types']))
             
             # Get prediction for current sequence
-            prediction = agent.predict_rating()
+            prediction = result['prediction']
             if prediction is not None:
-                print(f"\nPredicted rating: {prediction:.2f}")
+                cached = " (cached)" if result['cached'] else ""
+                print(f"\nPredicted rating: {prediction:.2f}{cached}")
         else:
             print("No ads detected on the page")
         
     except Exception as e:
         print(f"Error in prediction mode: {str(e)}")
 
+def crawl_mode(args):
+    """Crawl mode for scoring a URL list on a pool of browsers"""
+    from agent_pool import WebAgentPool
+    from crawl import CrawlScheduler, read_url_list
+    from creative_index import CreativeIndex
+    from result_cache import ResultCache
+
+    urls = read_url_list(args.urls_file)
+    queue_file = args.queue_file or f'{args.results}.queue'
+    cache = ResultCache(ttl=args.cache_ttl, path=args.cache_file) if args.cache_file else None
+    creatives = CreativeIndex(args.creative_index) if args.creative_index else None
+    print(f"Crawling {len(urls)} URLs with {args.workers or os.cpu_count()} browsers...")
+
+    with WebAgentPool(size=args.workers, chrome_options={'launch_profile': args.launch_profile},
+                      result_cache=cache, snapshot_detection=args.snapshot_detection,
+                      creative_index=creatives, model_path=args.model_path, lite_model=args.lite_model) as pool:
+        scheduler = CrawlScheduler(pool, per_domain=args.per_domain, domain_delay=args.domain_delay)
+        # Per-ad scores are what the creative index reuses
+        summary = scheduler.run(urls, queue_file, args.results, score_elements=creatives is not None)
+    if cache:
+        cache.save()
+    if creatives:
+        creatives.save()
+        stats = creatives.stats()
+        print(f"Creative index: {stats['entries']} creatives, {stats['hit_rate']:.1%} of ads reused")
+
+    print(f"Done: {summary['done']}, failed: {summary['failed']}, "
+          f"skipped from earlier runs: {summary['skipped']}")
+    print(f"{summary['urls_per_minute']:.1f} URLs per minute; results in {args.results}")
+
 def main():
     parser = argparse.ArgumentParser(description='Web Agent CLI with Ad Rating')
-    parser.add_argument('--url', type=str, required=True, help='URL to navigate to')
-    parser.add_argument('--mode', choices=['train', 'predict'], required=True, 
-                      help='Operation mode: train (for learning) or predict (for rating)')
+    parser.add_argument('--url', type=str, help='URL to navigate to (train and predict modes)')
+    parser.add_argument('--mode', choices=['train', 'predict', 'crawl'], required=True, 
+                      help='Operation mode: train (for learning), predict (for rating) '
+                           'or crawl (score a URL list)')
     parser.add_argument('--scroll', choices=['up', 'down'], help='Scroll direction')
     parser.add_argument('--scroll-amount', type=int, default=300, help='Scroll amount in pixels')
     parser.add_argument('--click', type=str, help='Click coordinates (format: x,y)')
+    parser.add_argument('--cache-file', type=str,
+                      help='Reuse predictions cached in this file and update it (predict mode)')
+    parser.add_argument('--cache-ttl', type=int, default=3600,
+                      help='Seconds a cached prediction is reused without reloading the page')
+    parser.add_argument('--metrics-file', type=str,
+                      help='Write timing histograms and WebDriver round-trip counts here on exit')
+    parser.add_argument('--online', action='store_true',
+                      help='Update the model after every rating instead of retraining at the end')
+    parser.add_argument('--launch-profile', choices=sorted(LAUNCH_PROFILES), default='default',
+                      help='Browser preset; scoring is headless and skips fonts, media and images')
+    parser.add_argument('--snapshot-detection', action='store_true',
+                      help='Detect ads from one DOM snapshot, including iframes and shadow roots')
+    parser.add_argument('--urls-file', type=str, help='File with one URL per line (crawl mode)')
+    parser.add_argument('--results', type=str, default='crawl_results.jsonl',
+                      help='JSON Lines file crawl results are appended to')
+    parser.add_argument('--queue-file', type=str,
+                      help='Crawl checkpoint used to resume (default: <results>.queue)')
+    parser.add_argument('--creative-index', type=str,
+                      help='Score every ad in crawl mode, reusing scores of near-duplicate creatives '
+                           'indexed in this file')
+    parser.add_argument('--model-path', type=str,
+                      help='Saved model directory loaded by every crawl browser (default: models)')
+    parser.add_argument('--lite-model', action='store_true',
+                      help='Serve the quantized TFLite artifact from --model-path instead of Keras')
+    parser.add_argument('--workers', type=int, help='Browsers used by crawl mode (default: CPU count)')
+    parser.add_argument('--per-domain', type=int, default=2, help='Concurrent pages per domain while crawling')
+    parser.add_argument('--domain-delay', type=float, default=1.0,
+                      help='Minimum seconds between page loads on one domain while crawling')
     
     args = parser.parse_args()
     
+    if args.mode == 'crawl':
+        if not args.urls_file:
+            parser.error("--urls-file is required in crawl mode")
+        # Without a trained model every crawled URL would fail; say so before launching browsers
+        args.model_path = args.model_path or 'models'
+        model_file = LITE_MODEL_FILE if args.lite_model else 'scaler.pkl'
+        if not os.path.exists(os.path.join(args.model_path, model_file)):
+            parser.error(f"crawl mode needs a trained model, but {args.model_path} has no {model_file}; "
+                         f"train (and for --lite-model, export) one first or pass --model-path")
+        try:
+            crawl_mode(args)
+        finally:
+            if args.metrics_file:
+                REGISTRY.dump(args.metrics_file)
+        return
+    if not args.url:
+        parser.error("--url is required in train and predict modes")
+    
     agent = WebAgent()
+    agent.snapshot_detection = args.snapshot_detection
     
     try:
         print("Initializing web agent...")
-        agent.initialize()
+        agent.initialize(chrome_options={'launch_profile': args.launch_profile})
+        
+        if args.online:
+            agent.enable_online_learning()
+        
+        if args.cache_file:
+            agent.enable_result_cache(ttl=args.cache_ttl, path=args.cache_file)
         
         if args.mode == 'train':
             train_mode(agent, args.url)
         else:  # predict mode
-            predict_mode(agent, args.url)
+            predict_mode(agent, args.url, interactive=bool(args.scroll or args.click))
             
         if args.scroll:
             print(f"Scrolling {args.scroll}...")
@@ -116,6 +214,8 @@ def main():
         print(f"Error: {str(e)}")
     finally:
         agent.close()
+        if args.metrics_file:
+            REGISTRY.dump(args.metrics_file)
 
 if __name__ == "__main__":
     main()
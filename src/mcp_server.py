@@ -8,13 +8,36 @@ from modelcontextprotocol.sdk.types import (
     ErrorCode
 )
 from agent import WebAgent
+from metrics import REGISTRY
 import os
 import json
 import logging
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+DEFAULT_SESSION = "default"
+
+# Seconds each tool may spend in blocking agent work before the call fails
+TOOL_TIMEOUTS = {
+    "initialize_agent": 120,
+    "start_training": 60,
+    "rate_sequence": 30,
+    "predict_rating": 90,
+    "predict_batch": 900,
+    "close_agent": 30,
+    "get_cache_stats": 10
+}
+
+SESSION_PROPERTY = {
+    "type": "string",
+    "description": "Name of the agent session (defaults to 'default')"
+}
+
 class AdAgentServer:
-    def __init__(self):
+    def __init__(self, max_workers=None, tool_timeouts=None):
         self.server = Server(
             {
                 "name": "ad-agent-server",
@@ -27,7 +50,11 @@ class AdAgentServer:
             }
         )
         
-        self.agent = None
+        # Named agent sessions; each session serializes its own Selenium calls
+        self.agents = {}
+        self.session_locks = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ad-agent")
+        self.tool_timeouts = dict(TOOL_TIMEOUTS, **(tool_timeouts or {}))
         self.setup_logging()
         self.setup_handlers()
 
@@ -57,7 +84,16 @@ class AdAgentServer:
                             "profile_path": {
                                 "type": "string",
                                 "description": "Path to Chrome user profile directory"
-                            }
+                            },
+                            "online_learning": {
+                                "type": "boolean",
+                                "description": "Update the model after every rate_sequence call"
+                            },
+                            "cache_file": {
+                                "type": "string",
+                                "description": "File to persist cached predictions between runs"
+                            },
+                            "session": SESSION_PROPERTY
                         },
                         "required": ["profile_path"]
                     }
@@ -71,7 +107,8 @@ class AdAgentServer:
                             "url": {
                                 "type": "string",
                                 "description": "URL to navigate to"
-                            }
+                            },
+                            "session": SESSION_PROPERTY
                         },
                         "required": ["url"]
                     }
@@ -87,7 +124,8 @@ class AdAgentServer:
                                 "description": "Rating value between 0 and 1",
                                 "minimum": 0,
                                 "maximum": 1
-                            }
+                            },
+                            "session": SESSION_PROPERTY
                         },
                         "required": ["rating"]
                     }
@@ -101,17 +139,67 @@ class AdAgentServer:
                             "url": {
                                 "type": "string",
                                 "description": "URL to analyze"
-                            }
+                            },
+                            "session": SESSION_PROPERTY
                         },
                         "required": ["url"]
                     }
                 },
+                {
+                    "name": "predict_batch",
+                    "description": "Score many URLs (with a score per detected ad) or recorded action sequences in one call",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "urls": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "URLs to load and score in turn"
+                            },
+                            "sequences": {
+                                "type": "array",
+                                "items": {"type": "array", "items": {"type": "object"}},
+                                "description": "Recorded action sequences to score without a browser"
+                            },
+                            "score_elements": {
+                                "type": "boolean",
+                                "description": "Score every detected ad on each URL (default true)"
+                            },
+                            "session": SESSION_PROPERTY
+                        }
+                    }
+                },
+                {
+                    "name": "get_cache_stats",
+                    "description": "Get prediction cache hit/miss statistics",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "session": SESSION_PROPERTY
+                        }
+                    }
+                },
+                {
+                    "name": "get_metrics",
+                    "description": "Get timing histograms and WebDriver round-trip counts for agent operations",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "reset": {
+                                "type": "boolean",
+                                "description": "Clear the metrics after reading them"
+                            }
+                        }
+                    }
+                },
                 {
                     "name": "close_agent",
                     "description": "Close the web agent",
                     "inputSchema": {
                         "type": "object",
-                        "properties": {}
+                        "properties": {
+                            "session": SESSION_PROPERTY
+                        }
                     }
                 }
             ]
@@ -120,18 +208,28 @@ class AdAgentServer:
     async def handle_call_tool(self, request):
         try:
             tool_name = request.params.name
-            args = request.params.arguments
+            args = request.params.arguments or {}
+            session = args.get("session") or DEFAULT_SESSION
 
             if tool_name == "initialize_agent":
-                return await self.initialize_agent(args.get("profile_path"))
+                return await self.initialize_agent(args.get("profile_path"), session,
+                                                   args.get("online_learning", False),
+                                                   args.get("cache_file"))
             elif tool_name == "start_training":
-                return await self.start_training(args.get("url"))
+                return await self.start_training(args.get("url"), session)
             elif tool_name == "rate_sequence":
-                return await self.rate_sequence(args.get("rating"))
+                return await self.rate_sequence(args.get("rating"), session)
             elif tool_name == "predict_rating":
-                return await self.predict_rating(args.get("url"))
+                return await self.predict_rating(args.get("url"), session)
+            elif tool_name == "predict_batch":
+                return await self.predict_batch(args.get("urls"), args.get("sequences"), session,
+                                                args.get("score_elements", True))
+            elif tool_name == "get_cache_stats":
+                return await self.get_cache_stats(session)
+            elif tool_name == "get_metrics":
+                return await self.get_metrics(args.get("reset", False))
             elif tool_name == "close_agent":
-                return await self.close_agent()
+                return await self.close_agent(session)
             else:
                 raise McpError(ErrorCode.MethodNotFound, f"Unknown tool: {tool_name}")
 
@@ -139,14 +237,85 @@ class AdAgentServer:
             logging.error(f"Error handling tool call: {str(e)}")
             raise McpError(ErrorCode.InternalError, str(e))
 
-    async def initialize_agent(self, profile_path):
+    def get_agent(self, session):
+        """Return the agent for a session or fail if it was never initialized"""
+        agent = self.agents.get(session)
+        if not agent:
+            raise McpError(ErrorCode.InvalidRequest, f"Agent not initialized for session '{session}'")
+        return agent
+
+    def _run_locked(self, session, func, *args):
+        """Run blocking agent work while holding the session's lock"""
+        lock = self.session_locks.setdefault(session, threading.Lock())
+        with lock:
+            return func(*args)
+
+    async def run_blocking(self, tool_name, session, func, *args, locked=True):
+        """Run blocking agent work in the executor with the tool's timeout
+
+        Work still queued when the timeout expires is cancelled. Work that
+        already started cannot be interrupted from here, so a timed-out
+        locked call aborts its session instead: the agent is dropped and
+        its browser quit, which fails the stuck WebDriver command and
+        releases the session lock. The session must be initialized again.
+        """
+        if locked:
+            call = functools.partial(self._run_locked, session, func, *args)
+        else:
+            call = functools.partial(func, *args)
+        timeout = self.tool_timeouts.get(tool_name)
+        future = self.executor.submit(call)
         try:
-            self.agent = WebAgent()
-            options = {
-                'user_data_dir': profile_path,
-                'profile_directory': 'Default'
-            }
-            self.agent.initialize(chrome_options=options)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"{tool_name} timed out after {timeout}s in session '{session}'")
+            if locked and not future.cancelled():
+                self._abort_session(session, future)
+            raise McpError(ErrorCode.InternalError, f"{tool_name} timed out after {timeout}s")
+
+    def _abort_session(self, session, future):
+        """Quit the session's browser so timed-out work stops, and forget the agent"""
+        agent = self.agents.pop(session, None)
+        if agent:
+            logging.warning(f"Aborting session '{session}'; initialize it again to continue")
+            self.executor.submit(self._close_quietly, agent)
+
+        def close_late_agent(done):
+            # A timed-out initialize_agent may still finish and launch a browser nobody owns
+            if not done.cancelled() and done.exception() is None and isinstance(done.result(), WebAgent):
+                self._close_quietly(done.result())
+
+        future.add_done_callback(close_late_agent)
+
+    def _close_quietly(self, agent):
+        try:
+            agent.close()
+        except Exception as e:
+            logging.error(f"Failed to close aborted agent: {str(e)}")
+
+    async def initialize_agent(self, profile_path, session=DEFAULT_SESSION, online_learning=False,
+                               cache_file=None):
+        try:
+            previous = self.agents.pop(session, None)
+            if previous:
+                await self.run_blocking("close_agent", session, previous.close, locked=False)
+
+            def initialize():
+                agent = WebAgent()
+                options = {
+                    'user_data_dir': profile_path,
+                    'profile_directory': 'Default'
+                }
+                if session != DEFAULT_SESSION:
+                    # Additional browsers need their own debugging port
+                    options['remote_debugging_port'] = 0
+                agent.initialize(chrome_options=options)
+                if online_learning:
+                    agent.enable_online_learning()
+                agent.enable_result_cache(path=cache_file)
+                return agent
+
+            self.agents[session] = await self.run_blocking("initialize_agent", session, initialize)
             return {
                 "content": [{
                     "type": "text",
@@ -156,13 +325,15 @@ class AdAgentServer:
         except Exception as e:
             raise McpError(ErrorCode.InternalError, f"Failed to initialize agent: {str(e)}")
 
-    async def start_training(self, url):
-        if not self.agent:
-            raise McpError(ErrorCode.InvalidRequest, "Agent not initialized")
+    async def start_training(self, url, session=DEFAULT_SESSION):
+        agent = self.get_agent(session)
         
         try:
-            self.agent.start_training_sequence()
-            self.agent.navigate_to(url)
+            def start():
+                agent.start_training_sequence()
+                agent.navigate_to(url)
+
+            await self.run_blocking("start_training", session, start)
             return {
                 "content": [{
                     "type": "text",
@@ -172,13 +343,15 @@ class AdAgentServer:
         except Exception as e:
             raise McpError(ErrorCode.InternalError, f"Failed to start training: {str(e)}")
 
-    async def rate_sequence(self, rating):
-        if not self.agent:
-            raise McpError(ErrorCode.InvalidRequest, "Agent not initialized")
+    async def rate_sequence(self, rating, session=DEFAULT_SESSION):
+        agent = self.get_agent(session)
         
         try:
-            self.agent.end_training_sequence(rating)
-            self.agent.start_training_sequence()  # Start new sequence
+            def rate():
+                agent.end_training_sequence(rating)
+                agent.start_training_sequence()  # Start new sequence
+
+            await self.run_blocking("rate_sequence", session, rate)
             return {
                 "content": [{
                     "type": "text",
@@ -188,32 +361,100 @@ class AdAgentServer:
         except Exception as e:
             raise McpError(ErrorCode.InternalError, f"Failed to rate sequence: {str(e)}")
 
-    async def predict_rating(self, url):
-        if not self.agent:
-            raise McpError(ErrorCode.InvalidRequest, "Agent not initialized")
+    async def predict_rating(self, url, session=DEFAULT_SESSION):
+        agent = self.get_agent(session)
         
         try:
-            self.agent.navigate_to(url)
-            ad_data = self.agent.detect_ad_content()
-            prediction = self.agent.predict_rating()
+            def predict():
+                # A training sequence the client is recording survives the prediction
+                with agent.preserved_recording():
+                    return agent.predict_url(url)
+
+            result = await self.run_blocking("predict_rating", session, predict)
             
             return {
                 "content": [{
                     "type": "text",
                     "text": json.dumps({
-                        "prediction": float(prediction) if prediction is not None else None,
-                        "ad_data": ad_data
+                        "prediction": result['prediction'],
+                        "ad_data": result['ad_data'],
+                        "cached": result['cached']
                     }, indent=2)
                 }]
             }
         except Exception as e:
             raise McpError(ErrorCode.InternalError, f"Failed to predict rating: {str(e)}")
 
-    async def close_agent(self):
-        if self.agent:
+    async def predict_batch(self, urls=None, sequences=None, session=DEFAULT_SESSION, score_elements=True):
+        agent = self.get_agent(session)
+        if not urls and not sequences:
+            raise McpError(ErrorCode.InvalidParams, "predict_batch needs urls or sequences")
+
+        try:
+            def predict():
+                results = {}
+                if sequences:
+                    results["sequences"] = agent.predict_ratings(sequences).tolist()
+                if urls:
+                    with agent.preserved_recording():
+                        results["urls"] = [self._predict_url_entry(agent, url, score_elements) for url in urls]
+                return results
+
+            results = await self.run_blocking("predict_batch", session, predict)
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": json.dumps(results, indent=2)
+                }]
+            }
+        except McpError:
+            raise
+        except Exception as e:
+            raise McpError(ErrorCode.InternalError, f"Failed to predict batch: {str(e)}")
+
+    def _predict_url_entry(self, agent, url, score_elements):
+        """Score one URL for predict_batch, reporting failures per URL"""
+        try:
+            result = agent.predict_url(url, score_elements)
+        except Exception as e:
+            logging.error(f"Failed to predict {url}: {str(e)}")
+            return {"url": url, "prediction": None, "ads": [], "cached": False, "error": str(e)}
+
+        elements = (result['ad_data'] or {}).get('elements', [])
+        ads = [{"index": i, "type": element.get('type'), "x": element.get('x'), "y": element.get('y'),
+                "score": element.get('score')} for i, element in enumerate(elements)]
+        # Best-rated ads first
+        ads.sort(key=lambda ad: -1 if ad["score"] is None else ad["score"], reverse=True)
+        return {"url": url, "prediction": result['prediction'], "ads": ads,
+                "cached": result['cached'], "error": None}
+
+    async def get_cache_stats(self, session=DEFAULT_SESSION):
+        agent = self.get_agent(session)
+        stats = agent.result_cache.stats() if agent.result_cache else {}
+        return {
+            "content": [{
+                "type": "text",
+                "text": json.dumps(stats, indent=2)
+            }]
+        }
+
+    async def get_metrics(self, reset=False):
+        text = REGISTRY.to_json(indent=2)
+        if reset:
+            REGISTRY.reset()
+        return {
+            "content": [{
+                "type": "text",
+                "text": text
+            }]
+        }
+
+    async def close_agent(self, session=DEFAULT_SESSION):
+        agent = self.agents.pop(session, None)
+        if agent:
             try:
-                self.agent.close()
-                self.agent = None
+                # Not serialized behind the session lock so a hung page load can be aborted
+                await self.run_blocking("close_agent", session, agent.close, locked=False)
                 return {
                     "content": [{
                         "type": "text",
@@ -230,5 +471,4 @@ class AdAgentServer:
 
 if __name__ == "__main__":
     server = AdAgentServer()
-    import asyncio
     asyncio.run(server.run())
@@ -0,0 +1,134 @@
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds
+BUCKET_BOUNDS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+                    1000, 2500, 5000, 10000, 30000, 60000, float('inf')]
+
+class Histogram:
+    """Fixed-bucket latency histogram with exact count, sum, min and max"""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKET_BOUNDS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+
+    def observe(self, milliseconds):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        self.min_ms = min(self.min_ms, milliseconds)
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction, capped at the observed max"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, bucket in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'min_ms': self.min_ms if self.count else 0.0,
+            'max_ms': self.max_ms,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): bucket
+                        for bound, bucket in zip(BUCKET_BOUNDS_MS, self.buckets) if bucket}
+        }
+
+class MetricsRegistry:
+    """In-process registry of latency histograms and counters"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        """Record one duration in seconds"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds * 1000)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name):
+        """Time a with-block into the named histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator timing every call of a function into the named histogram"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return all histograms and counters as plain dicts"""
+        with self._lock:
+            return {
+                'timers': {name: h.summary() for name, h in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items()))
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def dump(self, path):
+        """Write the snapshot to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def instrument_driver(self, driver):
+        """Count and time every WebDriver command sent by driver and its elements"""
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.increment('webdriver.round_trips')
+            self.increment(f'webdriver.command.{driver_command}')
+            with self.timer('webdriver.round_trip'):
+                return execute(driver_command, params)
+
+        driver.execute = counted_execute
+        return driver
+
+# Process-wide registry used by the agent and model
+REGISTRY = MetricsRegistry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
@@ -1,15 +1,132 @@
-import tensorflow as tf
+import logging
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
 import json
+import uuid
+import warnings
+from collections import defaultdict
 from datetime import datetime
+from itertools import chain
+from operator import itemgetter
+from metrics import timed
+
+# Integer codes for recorded action types
+ACTION_CODES = {'navigate': 0, 'click': 1, 'scroll': 2, 'detect_ads': 3, 'hover': 4, 'ad_visible': 5}
+
+# Feature columns filled from the last 'detect_ads' action of a sequence
+AD_FEATURE_NAMES = ['ad_position', 'image_present', 'video_present', 'text_length']
+
+# Dwell-time features summed from captured page events, in seconds, by action type
+DWELL_FEATURES = {'ad_visible': 'ad_visible_time', 'hover': 'ad_hover_time'}
+
+# Integer action params kept by columnar storage; scroll amounts are signed by direction.
+# 'duration' (ms) and 'ad' (captured ad id) were added last, so older shards may lack them
+PARAM_COLUMNS = ['amount', 'x', 'y', 'count'] + AD_FEATURE_NAMES + ['duration', 'ad']
+
+# Longest range of timestamps assumed to share one UTC offset (see parse_timestamps)
+UNIFORM_OFFSET_SPAN = 7 * 24 * 3600
+
+# Network shape and fit settings used by setup_model and fit_features
+DEFAULT_HYPERPARAMETERS = {
+    'layers': (64, 32, 16),
+    'dropout': 0.2,
+    'learning_rate': 0.001,
+    'epochs': 50,
+    'batch_size': 32
+}
+
+def summarize_ad_data(ad_data):
+    """Reduce detect_ad_content output to the ad feature columns"""
+    if not ad_data:
+        return {name: 0 for name in AD_FEATURE_NAMES}
+    elements = ad_data.get('elements', [])
+    return {
+        'count': ad_data['count'],
+        'ad_position': min((position['y'] for position in ad_data['positions']), default=0),
+        'image_present': int('image' in ad_data['types']),
+        'video_present': int('video' in ad_data['types']),
+        'text_length': sum(element.get('text_length', 0) for element in elements)
+    }
+
+def parse_timestamps(timestamps):
+    """Parse ISO timestamps into epoch seconds, reading naive ones as local time
+
+    This matches datetime.fromisoformat(t).timestamp(), as used by
+    ActionBuffer. NumPy parses naive timestamps as UTC, so its vectorized
+    result is shifted back by the local UTC offset. That happens only when
+    the offset is the same at both ends of a range shorter than
+    UNIFORM_OFFSET_SPAN; otherwise (a DST change, timezone-aware strings)
+    every timestamp is parsed with datetime.
+    """
+    if not timestamps:
+        return np.zeros(0)
+    try:
+        with warnings.catch_warnings():
+            # NumPy only warns about timezone-aware strings
+            warnings.simplefilter('error')
+            wall = np.array(timestamps, dtype='datetime64[us]').astype(np.int64) / 1e6
+    except (ValueError, TypeError, DeprecationWarning):
+        wall = None
+    if wall is not None:
+        ends = (int(wall.argmin()), int(wall.argmax()))
+        offsets = {round(wall[i] - datetime.fromisoformat(timestamps[i]).timestamp(), 6) for i in ends}
+        if len(offsets) == 1 and wall[ends[1]] - wall[ends[0]] < UNIFORM_OFFSET_SPAN:
+            return wall - offsets.pop()
+    return np.array([datetime.fromisoformat(t).timestamp() for t in timestamps])
+
+def stack_sequence_columns(action_sequences):
+    """Concatenate the columns of ActionBuffer-backed sequences
+
+    Returns codes, timestamps, params and offsets as used by
+    extract_features_columns, or None if any sequence is a plain list of
+    action dicts.
+    """
+    parts = []
+    for sequence in action_sequences:
+        columns = getattr(sequence, 'columns', None)
+        if columns is None:
+            return None
+        parts.append(columns())
+    lengths = [len(part['codes']) for part in parts]
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if not parts:
+        return {'codes': np.zeros(0, dtype=np.uint8), 'timestamps': np.zeros(0),
+                'params': np.zeros((0, len(PARAM_COLUMNS)), dtype=np.int32), 'offsets': offsets}
+    stacked = {key: np.concatenate([part[key] for part in parts]) for key in ('codes', 'timestamps', 'params')}
+    stacked['offsets'] = offsets
+    return stacked
+
+# Quantized TFLite artifact written next to the Keras model by AdRatingModel.save
+LITE_MODEL_FILE = 'ad_rating_model.tflite'
+
+# Feature columns a model was trained on, saved next to it
+FEATURE_NAMES_FILE = 'feature_names.json'
+
+class FeatureMismatchError(ValueError):
+    """A saved model was trained on other feature columns than this version extracts"""
+
+# NumPy equivalents of the Keras activations used by setup_model
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'linear': lambda x: x
+}
 
 class AdRatingModel:
-    def __init__(self):
-        self.model = None
-        self.scaler = StandardScaler()
+    # TensorFlow and scikit-learn are imported the first time the model or
+    # scaler is used, so importing this module and constructing an
+    # AdRatingModel stay cheap for commands that never predict
+    def __init__(self, hyperparameters=None):
+        self._model = None
+        self._scaler = None
+        self.hyperparameters = dict(DEFAULT_HYPERPARAMETERS, **(hyperparameters or {}))
+        # Exported (weights, bias, activation) layers for the NumPy forward pass
+        self.inference_layers = None
+        # TFLitePredictor set by load(lite=True); serves forward until a Keras model is loaded
+        self.lite_predictor = None
+        # Changes whenever the weights or scaler do; result caches key their entries on it
+        self.version = None
         self.feature_names = [
             'scroll_distance',
             'time_spent',
@@ -17,29 +134,88 @@ class AdRatingModel:
             'ad_position',
             'image_present',
             'video_present',
-            'text_length'
+            'text_length',
+            'ad_visible_time',
+            'ad_hover_time'
         ]
-        self.setup_model()
+
+    @property
+    def model(self):
+        """Keras model, built on first access
+
+        Raises once a TFLite artifact is loaded: a freshly built network
+        would have untrained weights.
+        """
+        if self._model is None:
+            if self.lite_predictor is not None:
+                raise RuntimeError("Only a TFLite model is loaded; load(path) the Keras model "
+                                   "to train it or predict with fast=False")
+            self.setup_model()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        if value is not None:
+            self.lite_predictor = None
+            self.mark_changed()
+
+    def mark_changed(self, saved_file=None):
+        """Assign a new version after the weights or scaler change
+
+        A model loaded from saved_file gets a version derived from that
+        file's path and modification time, so agents loading the same
+        saved model share cached predictions.
+        """
+        if saved_file:
+            self.version = f'{os.path.abspath(saved_file)}@{os.path.getmtime(saved_file)}'
+        else:
+            self.version = uuid.uuid4().hex
+
+    @property
+    def scaler(self):
+        """Feature scaler, created on first access"""
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
 
     def setup_model(self):
         """Initialize the neural network model"""
-        self.model = tf.keras.Sequential([
-            tf.keras.layers.Dense(64, activation='relu', input_shape=(len(self.feature_names),)),
-            tf.keras.layers.Dropout(0.2),
-            tf.keras.layers.Dense(32, activation='relu'),
-            tf.keras.layers.Dropout(0.2),
-            tf.keras.layers.Dense(16, activation='relu'),
-            tf.keras.layers.Dense(1, activation='sigmoid')  # Binary classification for ad rating
-        ])
+        import tensorflow as tf
+
+        self.inference_layers = None
+        sizes = list(self.hyperparameters['layers'])
+        dropout = self.hyperparameters['dropout']
+        layers = []
+        for i, size in enumerate(sizes):
+            if i == 0:
+                layers.append(tf.keras.layers.Dense(size, activation='relu', input_shape=(len(self.feature_names),)))
+            else:
+                layers.append(tf.keras.layers.Dense(size, activation='relu'))
+            # Every hidden layer but the last is followed by dropout
+            if dropout and i < len(sizes) - 1:
+                layers.append(tf.keras.layers.Dropout(dropout))
+        layers.append(tf.keras.layers.Dense(1, activation='sigmoid'))  # Binary classification for ad rating
+        self.model = tf.keras.Sequential(layers)
         
         self.model.compile(
-            optimizer='adam',
+            optimizer=tf.keras.optimizers.Adam(learning_rate=self.hyperparameters['learning_rate']),
             loss='binary_crossentropy',
             metrics=['accuracy']
         )
 
+    @timed('model.extract_features')
     def extract_features(self, action_data):
         """Extract relevant features from recorded actions"""
+        if hasattr(action_data, 'columns'):
+            columns = stack_sequence_columns([action_data])
+            return self.extract_features_columns(**columns)
+
         features = {name: 0 for name in self.feature_names}
         
         # Process action data
@@ -48,103 +224,625 @@ class AdRatingModel:
                 features['scroll_distance'] += abs(action['params'].get('amount', 0))
             elif action['type'] == 'click':
                 features['click_count'] += 1
-            
-            # Calculate time spent (if timestamps available)
-            if len(action_data) > 1:
-                start_time = datetime.fromisoformat(action_data[0]['timestamp'])
-                end_time = datetime.fromisoformat(action_data[-1]['timestamp'])
-                features['time_spent'] = (end_time - start_time).total_seconds()
+            elif action['type'] == 'detect_ads':
+                for name in AD_FEATURE_NAMES:
+                    features[name] = action['params'].get(name, 0)
+            elif action['type'] in DWELL_FEATURES:
+                features[DWELL_FEATURES[action['type']]] += action['params'].get('duration', 0) / 1000
+        
+        # Calculate time spent (if timestamps available)
+        if len(action_data) > 1:
+            start_time = datetime.fromisoformat(action_data[0]['timestamp'])
+            end_time = datetime.fromisoformat(action_data[-1]['timestamp'])
+            features['time_spent'] = (end_time - start_time).total_seconds()
         
         return np.array([list(features.values())])
 
+    @timed('model.extract_features_batch')
+    def extract_features_batch(self, action_sequences):
+        """Extract the feature matrix for many sequences in one pass
+
+        Actions are flattened once, per-sequence sums are reduced with
+        np.bincount and only the first and last timestamp of each sequence
+        are parsed.
+        """
+        columns = stack_sequence_columns(action_sequences)
+        if columns is not None:
+            return self.extract_features_columns(**columns)
+
+        n_sequences = len(action_sequences)
+        X = np.zeros((n_sequences, len(self.feature_names)))
+        lengths = np.fromiter(map(len, action_sequences), dtype=np.int64, count=n_sequences)
+        if not lengths.sum():
+            return X
+
+        column = {name: i for i, name in enumerate(self.feature_names)}
+        seq_index = np.repeat(np.arange(n_sequences), lengths)
+        flat = list(chain.from_iterable(action_sequences))
+        code_of = defaultdict(lambda: -1, ACTION_CODES).__getitem__
+        codes = np.fromiter(map(code_of, map(itemgetter('type'), flat)), dtype=np.int8, count=len(flat))
+
+        scroll_positions = np.flatnonzero(codes == ACTION_CODES['scroll'])
+        amounts = np.array([flat[i]['params'].get('amount', 0) for i in scroll_positions.tolist()], dtype=np.float64)
+        X[:, column['scroll_distance']] = np.bincount(seq_index[scroll_positions], weights=np.abs(amounts),
+                                                      minlength=n_sequences)
+        X[:, column['click_count']] = np.bincount(seq_index[codes == ACTION_CODES['click']],
+                                                  minlength=n_sequences)
+
+        for action_type, name in DWELL_FEATURES.items():
+            positions = np.flatnonzero(codes == ACTION_CODES[action_type])
+            if len(positions):
+                durations = np.array([flat[i]['params'].get('duration', 0) for i in positions.tolist()],
+                                     dtype=np.float64)
+                X[:, column[name]] = np.bincount(seq_index[positions], weights=durations,
+                                                 minlength=n_sequences) / 1000
+
+        # Time spent: last minus first timestamp of every multi-action sequence
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        has_duration = lengths > 1
+        if has_duration.any():
+            first = parse_timestamps([flat[i]['timestamp'] for i in starts[has_duration].tolist()])
+            last = parse_timestamps([flat[i]['timestamp'] for i in (ends[has_duration] - 1).tolist()])
+            X[has_duration, column['time_spent']] = last - first
+
+        # Ad context comes from the last detection recorded in each sequence
+        detect_positions = np.flatnonzero(codes == ACTION_CODES['detect_ads'])
+        if len(detect_positions):
+            reversed_positions = detect_positions[::-1]
+            sequences, first_seen = np.unique(seq_index[reversed_positions], return_index=True)
+            rows = [[flat[i]['params'].get(name, 0) for name in AD_FEATURE_NAMES]
+                    for i in reversed_positions[first_seen].tolist()]
+            X[np.ix_(sequences, [column[name] for name in AD_FEATURE_NAMES])] = rows
+
+        return X
+
+    @timed('model.extract_features_columns')
+    def extract_features_columns(self, codes, timestamps, params, offsets):
+        """Extract the feature matrix from columnar action data
+
+        codes, timestamps and params hold one row per action (see
+        PARAM_COLUMNS for the params layout) and offsets marks where each
+        sequence starts, with a final entry for the total action count.
+        """
+        n_sequences = len(offsets) - 1
+        X = np.zeros((n_sequences, len(self.feature_names)))
+        if not n_sequences or not offsets[-1]:
+            return X
+
+        column = {name: i for i, name in enumerate(self.feature_names)}
+        lengths = np.diff(offsets)
+        seq_index = np.repeat(np.arange(n_sequences), lengths)
+        codes = np.asarray(codes)
+
+        scroll = codes == ACTION_CODES['scroll']
+        amounts = np.abs(params[scroll, PARAM_COLUMNS.index('amount')]).astype(np.float64)
+        X[:, column['scroll_distance']] = np.bincount(seq_index[scroll], weights=amounts, minlength=n_sequences)
+        X[:, column['click_count']] = np.bincount(seq_index[codes == ACTION_CODES['click']],
+                                                  minlength=n_sequences)
+
+        duration_column = PARAM_COLUMNS.index('duration')
+        if params.shape[1] > duration_column:
+            for action_type, name in DWELL_FEATURES.items():
+                dwell = codes == ACTION_CODES[action_type]
+                X[:, column[name]] = np.bincount(seq_index[dwell], weights=params[dwell, duration_column],
+                                                 minlength=n_sequences) / 1000
+
+        has_duration = lengths > 1
+        starts = np.asarray(offsets[:-1])[has_duration]
+        ends = np.asarray(offsets[1:])[has_duration] - 1
+        X[has_duration, column['time_spent']] = timestamps[ends] - timestamps[starts]
+
+        detect_positions = np.flatnonzero(codes == ACTION_CODES['detect_ads'])
+        if len(detect_positions):
+            reversed_positions = detect_positions[::-1]
+            sequences, first_seen = np.unique(seq_index[reversed_positions], return_index=True)
+            ad_columns = [PARAM_COLUMNS.index(name) for name in AD_FEATURE_NAMES]
+            X[np.ix_(sequences, [column[name] for name in AD_FEATURE_NAMES])] = \
+                params[reversed_positions[first_seen]][:, ad_columns]
+
+        return X
+
+    @timed('model.train')
     def train(self, action_sequences, ratings):
         """Train the model on user demonstrations"""
-        X = []
-        for sequence in action_sequences:
-            features = self.extract_features(sequence)
-            X.append(features[0])
-        
-        X = np.array(X)
+        X = self.extract_features_batch(action_sequences)
+        return self.fit_features(X, ratings)
+
+    @timed('model.fit_features')
+    def fit_features(self, X, ratings, validation_data=None, verbose=1):
+        """Train the model on an already extracted feature matrix
+
+        Without validation_data (an unscaled (X, ratings) pair) the last
+        20% of the rows are held out for validation.
+        """
         y = np.array(ratings)
         
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
+        if validation_data is not None:
+            X_val, y_val = validation_data
+            validation_data = (self.scaler.transform(X_val), np.array(y_val))
         
         # Train the model
         history = self.model.fit(
             X_scaled, y,
-            epochs=50,
-            batch_size=32,
-            validation_split=0.2,
-            verbose=1
+            epochs=self.hyperparameters['epochs'],
+            batch_size=self.hyperparameters['batch_size'],
+            validation_split=0.2 if validation_data is None else 0.0,
+            validation_data=validation_data,
+            verbose=verbose
         )
+        self.inference_layers = None
+        self.mark_changed()
         
         return history
 
-    def predict(self, action_data):
-        """Predict rating based on current action sequence"""
+    @timed('model.update')
+    def update(self, action_sequences, ratings, steps=1):
+        """Apply small gradient updates for newly rated sequences
+
+        Scaler statistics are updated with running mean and variance
+        (partial_fit), so each update costs time in the new data only.
+        """
+        X = self.extract_features_batch(action_sequences)
+        y = np.array(ratings, dtype=np.float32)
+        self.scaler.partial_fit(X)
+        X_scaled = self.scaler.transform(X)
+
+        for _ in range(steps):
+            loss = self.model.train_on_batch(X_scaled, y, return_dict=True)
+        self.inference_layers = None
+        self.mark_changed()
+
+        return loss
+
+    @timed('model.train_streaming')
+    def train_streaming(self, store, chunk_size=65536, epochs=None, batch_size=None,
+                        validation_fraction=0.2, shuffle_buffer=100000):
+        """Train from a TrainingStore without holding the training set in memory
+
+        A first pass fits the scaler chunk by chunk with partial_fit. Training
+        then reads chunks through an interleaved, prefetched tf.data pipeline
+        that scales, shuffles and batches them. Every k-th chunk is held out
+        for validation.
+        """
+        import tensorflow as tf
+        from sklearn.preprocessing import StandardScaler
+
+        epochs = epochs or self.hyperparameters['epochs']
+        batch_size = batch_size or self.hyperparameters['batch_size']
+        chunks = store.chunk_ranges(chunk_size)
+        if not chunks:
+            return None
+
+        self.scaler = StandardScaler()
+        for chunk in chunks:
+            X, _ = store.load_feature_chunk(self, *chunk)
+            self.scaler.partial_fit(X)
+        mean = self.scaler.mean_.astype(np.float32)
+        scale = self.scaler.scale_.astype(np.float32)
+
+        chunk_ids = np.arange(len(chunks))
+        if validation_fraction and len(chunks) > 1:
+            step = max(2, int(round(1 / validation_fraction)))
+            validation_ids = chunk_ids[chunk_ids % step == step - 1]
+        else:
+            validation_ids = chunk_ids[:0]
+        train_ids = np.setdiff1d(chunk_ids, validation_ids)
+
+        def read_chunk(chunk_id):
+            X, y = store.load_feature_chunk(self, *chunks[int(chunk_id)])
+            yield X.astype(np.float32), y.astype(np.float32)
+
+        signature = (
+            tf.TensorSpec(shape=(None, len(self.feature_names)), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32)
+        )
+
+        def pipeline(ids, shuffle):
+            dataset = tf.data.Dataset.from_tensor_slices(ids)
+            if shuffle:
+                dataset = dataset.shuffle(len(ids), reshuffle_each_iteration=True)
+            dataset = dataset.interleave(
+                lambda chunk_id: tf.data.Dataset.from_generator(
+                    read_chunk, output_signature=signature, args=(chunk_id,)),
+                num_parallel_calls=tf.data.AUTOTUNE,
+                deterministic=not shuffle
+            )
+            dataset = dataset.map(lambda X, y: ((X - mean) / scale, y),
+                                  num_parallel_calls=tf.data.AUTOTUNE)
+            dataset = dataset.unbatch()
+            if shuffle:
+                dataset = dataset.shuffle(shuffle_buffer)
+            return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+        history = self.model.fit(
+            pipeline(train_ids, shuffle=True),
+            epochs=epochs,
+            validation_data=pipeline(validation_ids, shuffle=False) if len(validation_ids) else None,
+            verbose=1
+        )
+        self.inference_layers = None
+        self.mark_changed()
+
+        return history
+
+    @timed('model.predict')
+    def predict(self, action_data, fast=True):
+        """Predict rating based on current action sequence
+
+        The fast path runs the exported weights through NumPy instead of the
+        Keras predict loop; set fast=False to go through Keras.
+        """
         features = self.extract_features(action_data)
+        if fast:
+            return float(self.forward(features)[0])
         features_scaled = self.scaler.transform(features)
-        prediction = self.model.predict(features_scaled)
+        prediction = self.model.predict(features_scaled, verbose=0)
         return float(prediction[0][0])
 
-    def save(self, path='models'):
-        """Save the model and scaler"""
+    @timed('model.predict_batch')
+    def predict_batch(self, action_sequences=None, features=None, fast=True):
+        """Score many sequences, or prebuilt feature rows, in one vectorized call
+
+        Pass either action_sequences (feature rows are built with
+        extract_features_batch) or a features matrix such as the one from
+        element_features. Returns one score per row.
+        """
+        if features is None:
+            features = self.extract_features_batch(action_sequences or [])
+        features = np.asarray(features, dtype=np.float64)
+        if not len(features):
+            return np.zeros(0)
+        if fast:
+            return self.forward(features)
+        features_scaled = self.scaler.transform(features)
+        return self.model.predict(features_scaled, batch_size=4096, verbose=0)[:, 0].astype(np.float64)
+
+    def element_features(self, action_data, elements):
+        """Build one feature row per detected ad element
+
+        Every row shares the sequence's interaction features; the ad columns
+        describe that element alone instead of the whole page.
+        """
+        X = np.repeat(self.extract_features(action_data), len(elements), axis=0)
+        if not len(elements):
+            return X
+        column = {name: i for i, name in enumerate(self.feature_names)}
+        types = [element.get('type') for element in elements]
+        X[:, column['ad_position']] = [element.get('y', 0) for element in elements]
+        X[:, column['image_present']] = [ad_type == 'image' for ad_type in types]
+        X[:, column['video_present']] = [ad_type == 'video' for ad_type in types]
+        X[:, column['text_length']] = [element.get('text_length', 0) for element in elements]
+        return X
+
+    def export_inference_layers(self):
+        """Export Dense weights with the StandardScaler folded into the first layer
+
+        Dropout is an identity at inference time, so only Dense layers are kept.
+        """
+        import tensorflow as tf
+        from sklearn.utils.validation import check_is_fitted
+
+        check_is_fitted(self.scaler)
+        layers = []
+        for layer in self.model.layers:
+            if not isinstance(layer, tf.keras.layers.Dense):
+                continue
+            weights, bias = [w.astype(np.float64) for w in layer.get_weights()]
+            layers.append([weights, bias, layer.get_config()['activation']])
+
+        # (x - mean) / scale @ W + b == x @ (W / scale) + (b - (mean / scale) @ W)
+        weights, bias, activation = layers[0]
+        mean = self.scaler.mean_ if self.scaler.with_mean else 0.0
+        scale = self.scaler.scale_ if self.scaler.with_std else 1.0
+        folded = weights / np.reshape(scale, (-1, 1))
+        layers[0] = [folded, bias - np.dot(mean, folded), activation]
+
+        self.inference_layers = [tuple(layer) for layer in layers]
+        return self.inference_layers
+
+    def forward(self, features):
+        """Score a matrix of unscaled feature rows with the NumPy forward pass
+
+        After load(lite=True) the TFLite artifact scores them instead, until
+        a Keras model is loaded.
+        """
+        if self.lite_predictor is not None:
+            if not len(features):
+                return np.zeros(0)
+            return self.lite_predictor.predict(features)
+        if self.inference_layers is None:
+            self.export_inference_layers()
+        output = np.asarray(features, dtype=np.float64)
+        for weights, bias, activation in self.inference_layers:
+            output = ACTIVATIONS[activation](output @ weights + bias)
+        return output[:, 0]
+
+    def save(self, path='models', export_lite=False, lite_quantization='float16'):
+        """Save the model and scaler, plus a quantized TFLite artifact with export_lite
+
+        Conversion is slow, so checkpoints skip it; see export_lite.
+        """
+        import joblib
+
         os.makedirs(path, exist_ok=True)
         self.model.save(os.path.join(path, 'ad_rating_model'))
         joblib.dump(self.scaler, os.path.join(path, 'scaler.pkl'))
+        with open(os.path.join(path, 'hyperparameters.json'), 'w') as f:
+            json.dump(dict(self.hyperparameters, layers=list(self.hyperparameters['layers'])), f, indent=2)
+        with open(os.path.join(path, FEATURE_NAMES_FILE), 'w') as f:
+            json.dump(self.feature_names, f, indent=2)
+        if export_lite:
+            self.export_lite(path, lite_quantization)
+
+    def export_lite(self, path='models', quantization='float16'):
+        """Write the TFLite artifact served by load(lite=True) to path
+
+        The artifact has the scaler folded in (see export_tflite); pass
+        quantization='int8' for smaller weights or None for float32.
+        """
+        from lite_model import export_tflite
+
+        os.makedirs(path, exist_ok=True)
+        return export_tflite(self.export_inference_layers(), os.path.join(path, LITE_MODEL_FILE), quantization)
 
-    def load(self, path='models'):
-        """Load the model and scaler"""
+    def check_feature_names(self, path, inputs):
+        """Raise FeatureMismatchError unless the model saved in path takes this version's features
+
+        Models saved before feature names were recorded are checked by
+        their input width only.
+        """
+        saved = None
+        features_file = os.path.join(path, FEATURE_NAMES_FILE)
+        if os.path.exists(features_file):
+            with open(features_file, 'r') as f:
+                saved = json.load(f)
+        if inputs != len(self.feature_names) or (saved is not None and saved != self.feature_names):
+            trained_on = saved if saved is not None else f"{inputs} features"
+            raise FeatureMismatchError(f"Model in {path} was trained on {trained_on}, but this version "
+                                       f"extracts {self.feature_names}; retrain it")
+
+    def load(self, path='models', lite=False):
+        """Load the model and scaler
+
+        Returns False if nothing loadable is saved in path, and raises
+        FeatureMismatchError for a model trained on other feature columns.
+        With lite, only the TFLite artifact is loaded and serves fast
+        predictions without Keras; predict(fast=False) and training raise
+        until the Keras model is loaded.
+        """
+        if lite:
+            return self.load_lite(path)
         try:
-            self.model = tf.keras.models.load_model(os.path.join(path, 'ad_rating_model'))
+            import joblib
+            import tensorflow as tf
+
+            model = tf.keras.models.load_model(os.path.join(path, 'ad_rating_model'))
+            self.check_feature_names(path, model.input_shape[-1])
+            self.model = model
             self.scaler = joblib.load(os.path.join(path, 'scaler.pkl'))
+            self.inference_layers = None
+            self.mark_changed(os.path.join(path, 'scaler.pkl'))
+            # Models saved before hyperparameters were recorded used the defaults
+            hyperparameters_file = os.path.join(path, 'hyperparameters.json')
+            if os.path.exists(hyperparameters_file):
+                with open(hyperparameters_file, 'r') as f:
+                    self.hyperparameters = dict(DEFAULT_HYPERPARAMETERS, **json.load(f))
+            self.lite_predictor = None
             return True
+        except FeatureMismatchError:
+            raise
         except:
             return False
 
+    def load_lite(self, path='models'):
+        """Serve predictions from the TFLite artifact saved in path"""
+        try:
+            from lite_model import TFLitePredictor
+
+            predictor = TFLitePredictor(os.path.join(path, LITE_MODEL_FILE))
+            self.check_feature_names(path, int(predictor.interpreter.get_input_details()[0]['shape'][-1]))
+            self.lite_predictor = predictor
+            self._model = None
+            self.inference_layers = None
+            self.mark_changed(predictor.path)
+            return True
+        except FeatureMismatchError:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to load TFLite model from {path}: {str(e)}")
+            return False
+
 class TrainingSession:
-    def __init__(self):
+    def __init__(self, model=None):
+        from action_sequence import ActionBuffer
+
+        # Recorded actions live in typed columns; sequences are views over them
+        self.actions = ActionBuffer()
+        self.sequence_start = 0
         self.action_sequences = []
         self.ratings = []
-        self.current_sequence = []
-        self.model = AdRatingModel()
+        # Columnar TrainingStore holding previously saved sequences
+        self.store = None
+        # Pass the agent's AdRatingModel so training updates the model used for predictions
+        self.model = model or AdRatingModel()
+        # Online learning: rated sequences waiting for the next mini-batch update
+        self.online = False
+        self.online_batch_size = 1
+        self.checkpoint_every = 50
+        self.checkpoint_path = 'models'
+        self.pending_sequences = []
+        self.pending_ratings = []
+        self.online_updates = 0
+
+    def enable_online_learning(self, batch_size=1, checkpoint_every=50, checkpoint_path='models'):
+        """Update the model as ratings arrive instead of retraining from scratch
+
+        Resumes from the checkpoint at checkpoint_path when one exists.
+        """
+        self.online = True
+        self.online_batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = checkpoint_path
+        if os.path.exists(os.path.join(checkpoint_path, 'scaler.pkl')):
+            self.model.load(checkpoint_path)
+
+    @property
+    def current_sequence(self):
+        """Actions recorded since the sequence started, as a list-like ActionSequence"""
+        from action_sequence import ActionSequence
+
+        return ActionSequence(self.actions, self.sequence_start)
+
+    @current_sequence.setter
+    def current_sequence(self, actions):
+        self.actions.truncate(self.sequence_start)
+        self.actions.extend(actions)
 
     def start_sequence(self):
         """Start recording a new action sequence"""
-        self.current_sequence = []
+        self.actions.truncate(self.sequence_start)
 
     def add_action(self, action):
         """Add an action to the current sequence"""
-        self.current_sequence.append(action)
+        self.actions.append(action)
+
+    def merge_actions(self, actions):
+        """Merge actions captured in the page into the current sequence in timestamp order"""
+        if not actions:
+            return
+        first_new = len(self.actions)
+        self.actions.extend(actions)
+        timestamps = self.actions.timestamps
+        if first_new > self.sequence_start and timestamps[first_new] < timestamps[first_new - 1]:
+            self.actions.sort_range(self.sequence_start)
 
     def end_sequence(self, rating):
         """End current sequence and add rating"""
-        if self.current_sequence:
-            self.action_sequences.append(self.current_sequence.copy())
+        from action_sequence import ActionSequence
+
+        if len(self.actions) > self.sequence_start:
+            self.action_sequences.append(ActionSequence(self.actions, self.sequence_start, len(self.actions)))
             self.ratings.append(rating)
-            self.current_sequence = []
+            self.sequence_start = len(self.actions)
+            if self.online:
+                self.pending_sequences.append(self.action_sequences[-1])
+                self.pending_ratings.append(rating)
+                if len(self.pending_ratings) >= self.online_batch_size:
+                    self.apply_online_update()
+
+    def apply_online_update(self):
+        """Update the model with pending rated sequences and checkpoint periodically"""
+        if not self.pending_ratings:
+            return None
+        loss = self.model.update(self.pending_sequences, self.pending_ratings)
+        self.pending_sequences = []
+        self.pending_ratings = []
+        self.online_updates += 1
+        if self.checkpoint_every and self.online_updates % self.checkpoint_every == 0:
+            self.model.save(self.checkpoint_path)
+        return loss
+
+    def finish_online_learning(self):
+        """Apply ratings still waiting for a mini-batch and checkpoint the model
+
+        Returns True if online updates were made and the model was saved.
+        """
+        self.apply_online_update()
+        if not self.online_updates:
+            return False
+        self.model.save(self.checkpoint_path)
+        return True
+
+    def train_model(self, streaming=False):
+        """Train the model on collected sequences and any attached store
+
+        With streaming enabled the attached store is read chunk by chunk
+        (see AdRatingModel.train_streaming); unsaved sequences must be
+        saved to the store first.
+        """
+        if streaming:
+            if self.store is None:
+                return None
+            return self.model.train_streaming(self.store)
+
+        if self.store is not None:
+            X, y = self.training_features()
+            if not len(y):
+                return None
+            return self.model.fit_features(X, y)
 
-    def train_model(self):
-        """Train the model on collected sequences"""
         if not self.action_sequences:
             return None
         return self.model.train(self.action_sequences, self.ratings)
 
+    def training_features(self):
+        """Feature matrix and ratings for the attached store plus collected sequences"""
+        X = np.zeros((0, len(self.model.feature_names)))
+        y = np.zeros(0, dtype=np.float32)
+        if self.store is not None:
+            X, y = self.store.load_features(self.model)
+        if self.action_sequences:
+            X = np.vstack([X, self.model.extract_features_batch(self.action_sequences)])
+            y = np.concatenate([y, self.ratings])
+        return X, y
+
+    def tune_model(self, space=None, folds=5, iterations=None, workers=None, path='models'):
+        """Search hyperparameters with k-fold cross-validation across processes
+
+        The best setting is refit on all data, replaces the session model's
+        network and scaler and is saved to path (see tuning.tune).
+        """
+        from tuning import tune
+
+        X, y = self.training_features()
+        if len(y) < folds:
+            return None
+        result = tune(X, y, space, folds=folds, iterations=iterations, workers=workers, path=path)
+        best = result['model']
+        # Keep the model object the agent predicts with
+        self.model.hyperparameters = best.hyperparameters
+        self.model.model = best.model
+        self.model.scaler = best.scaler
+        self.model.inference_layers = None
+        return result
+
     def save_training_data(self, path='training_data'):
-        """Save training data to file"""
-        os.makedirs(path, exist_ok=True)
-        data = {
-            'sequences': self.action_sequences,
-            'ratings': self.ratings
-        }
-        filename = os.path.join(path, f'training_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4, default=str)
+        """Append collected sequences to the columnar training store at path
+
+        Saved sequences move out of memory; the store stays attached so
+        train_model still sees them.
+        """
+        from training_store import TrainingStore
+
+        store = TrainingStore(path)
+        store.append(self.action_sequences, self.ratings)
+        self.store = store
+        self.action_sequences = []
+        self.ratings = []
+        # Keep only the unfinished sequence; pending online sequences still reference the old buffer
+        self.actions = self.actions.copy_range(self.sequence_start, len(self.actions))
+        self.sequence_start = 0
 
     def load_training_data(self, filename):
-        """Load training data from file"""
+        """Load training data from a columnar store directory or a legacy JSON file"""
+        if os.path.isdir(filename):
+            from training_store import TrainingStore
+
+            self.store = TrainingStore(filename)
+            return
+
+        from action_sequence import ActionBuffer, ActionSequence
+
         with open(filename, 'r') as f:
             data = json.load(f)
-            self.action_sequences = data['sequences']
-            self.ratings = data['ratings']
+        # Loaded sequences get their own buffer so the unfinished sequence stays contiguous
+        buffer = ActionBuffer()
+        self.action_sequences = []
+        for sequence in data['sequences']:
+            start = len(buffer)
+            buffer.extend(sequence)
+            self.action_sequences.append(ActionSequence(buffer, start, len(buffer)))
+        self.ratings = data['ratings']
@@ -0,0 +1,284 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from action_log import read_action_log
+
+# Uncompressed JSON Lines logs larger than this are split across workers
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Captured in the page by the interaction listener; there is nothing to re-drive
+PASSIVE_ACTIONS = ('hover', 'ad_visible')
+
+def split_visits(actions):
+    """Group actions into visits, each starting at a navigate action
+
+    Actions before the first navigate form a visit of their own.
+    """
+    visits = []
+    for action in actions:
+        if action['type'] == 'navigate' or not visits:
+            visits.append([])
+        visits[-1].append(action)
+    return visits
+
+def visit_summary(path, visit):
+    """Log, URL, start time and length of a visit"""
+    first = visit[0]
+    return {
+        'log': path,
+        'url': (first.get('params') or {}).get('url') if first['type'] == 'navigate' else None,
+        'start': first['timestamp'],
+        'actions': len(visit)
+    }
+
+def load_training_sequences(path):
+    """Recorded sequences of a legacy training_data_*.json file, or None for an action log"""
+    if not path.endswith('.json'):
+        return None
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data['sequences'] if isinstance(data, dict) else None
+
+def iter_log_actions(path):
+    """Yield actions from an action log, or from every sequence of a legacy training data file"""
+    sequences = load_training_sequences(path)
+    if sequences is None:
+        yield from read_action_log(path)
+        return
+    for sequence in sequences:
+        yield from sequence
+
+def log_tasks(path, chunk_bytes=CHUNK_BYTES):
+    """Split a log into (path, start, end) byte ranges; compressed and legacy logs are one task"""
+    if path.endswith('.jsonl') and os.path.getsize(path) > chunk_bytes:
+        size = os.path.getsize(path)
+        return [(path, start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+    return [(path, 0, None)]
+
+def read_log_range(path, start, end):
+    """Actions of the visits that begin in bytes start:end of a JSON Lines log
+
+    Lines belong to the range their first byte falls in. Actions before
+    the range's first navigate were read by the previous range, which
+    keeps reading past its end until the next navigate.
+    """
+    if end is None:
+        return list(iter_log_actions(path))
+
+    actions = []
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the line that straddles start; the previous range owns it
+            f.seek(start - 1)
+            f.readline()
+        started = start == 0
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                action = json.loads(line)
+            except ValueError:
+                logging.warning(f"Stopped reading {path} at truncated line at byte {position}")
+                break
+            is_navigate = action['type'] == 'navigate'
+            if position >= end and (is_navigate or not started):
+                break
+            if not started:
+                if not is_navigate:
+                    continue
+                started = True
+            actions.append(action)
+    return actions
+
+def _replay_task_features(task):
+    """Feature rows and visit summaries for one log range (runs in a worker process)"""
+    from ml_model import AdRatingModel
+
+    path, start, end = task
+    # Training data sequences are already split, and may not start with a navigate
+    visits = load_training_sequences(path) if end is None else None
+    if visits is None:
+        visits = split_visits(read_log_range(path, start, end))
+    features = AdRatingModel().extract_features_batch(visits)
+    return features, [visit_summary(path, visit) for visit in visits]
+
+def replay_features(paths, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Rebuild feature rows for every visit in the logs without a browser
+
+    Logs, and byte ranges of large uncompressed logs, are parsed and
+    featurized in a process pool. Returns the feature matrix, one summary
+    per row and replay stats including actions per second.
+    """
+    from ml_model import AdRatingModel
+
+    tasks = [task for path in paths for task in log_tasks(path, chunk_bytes)]
+    start = time.perf_counter()
+    blocks, visits = [], []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for features, summaries in executor.map(_replay_task_features, tasks):
+            blocks.append(features)
+            visits.extend(summaries)
+    seconds = time.perf_counter() - start
+
+    n_features = len(AdRatingModel().feature_names)
+    X = np.vstack(blocks) if blocks else np.zeros((0, n_features))
+    actions = sum(visit['actions'] for visit in visits)
+    stats = {'logs': len(paths), 'tasks': len(tasks), 'visits': len(visits), 'actions': actions,
+             'seconds': seconds, 'actions_per_second': actions / seconds if seconds else 0.0}
+    logging.info(f"Replayed {actions} actions into {len(visits)} feature rows: {stats}")
+    return X, visits, stats
+
+class ReplayEngine:
+    """Drives a WebAgent through a recorded action log
+
+    speed scales the recorded gaps between actions: 1.0 waits as long
+    as the user did, 10.0 ten times less, and None (time-compressed)
+    not at all. Every visit ends with a prediction, and the ad count the
+    replay detected is reported next to the recorded one for regression
+    checks.
+    """
+
+    def __init__(self, agent, speed=None, score_elements=False):
+        self.agent = agent
+        self.speed = speed
+        self.score_elements = score_elements
+
+    def _wait(self, previous, current, started):
+        """Sleep out the scaled recorded gap, minus the time the last action took"""
+        if not self.speed or previous is None:
+            return
+        gap = (datetime.fromisoformat(current) - datetime.fromisoformat(previous)).total_seconds()
+        remaining = gap / self.speed - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _perform(self, action, visit):
+        """Re-run one recorded action on the agent"""
+        params = action.get('params') or {}
+        action_type = action['type']
+        if action_type == 'navigate':
+            self.agent.navigate_to(params['url'])
+        elif action_type == 'click':
+            self.agent.click(params['x'], params['y'])
+        elif action_type == 'scroll':
+            self.agent.scroll(params.get('direction', 'down'), params.get('amount', 300))
+        elif action_type == 'detect_ads':
+            ad_data = self.agent.detect_ad_content(score_elements=self.score_elements)
+            visit['recorded_ads'] = params.get('count')
+            visit['replayed_ads'] = ad_data['count'] if ad_data else None
+        else:
+            return False
+        return True
+
+    def _finish_visit(self, visit):
+        try:
+            prediction = self.agent.predict_rating()
+        except Exception as e:
+            # e.g. no trained model loaded; the replay itself is still useful
+            visit['errors'].append(f"predict: {str(e)}")
+            prediction = None
+        visit['prediction'] = float(prediction) if prediction is not None else None
+        self.agent.reset_recording()
+        return visit
+
+    def replay(self, actions, log=None):
+        """Replay actions, returning one result per visit and replay stats"""
+        results = []
+        visit = None
+        counts = {'replayed': 0, 'skipped': 0, 'failed': 0}
+        previous = None
+        started = time.perf_counter()
+        start = started
+        for action in actions:
+            self._wait(previous, action['timestamp'], started)
+            previous = action['timestamp']
+            started = time.perf_counter()
+
+            if action['type'] == 'navigate' or visit is None:
+                if visit is not None:
+                    results.append(self._finish_visit(visit))
+                visit = {'log': log, 'url': (action.get('params') or {}).get('url'), 'errors': []}
+                self.agent.reset_recording()
+                self.agent.start_recording()
+            if action['type'] in PASSIVE_ACTIONS:
+                counts['skipped'] += 1
+                continue
+            try:
+                counts['replayed' if self._perform(action, visit) else 'skipped'] += 1
+            except Exception as e:
+                counts['failed'] += 1
+                visit['errors'].append(f"{action['type']}: {str(e)}")
+        if visit is not None:
+            results.append(self._finish_visit(visit))
+
+        seconds = time.perf_counter() - start
+        total = sum(counts.values())
+        stats = dict(counts, actions=total, seconds=seconds,
+                     actions_per_second=total / seconds if seconds else 0.0)
+        return results, stats
+
+def replay_logs(paths, pool, speed=None, score_elements=False):
+    """Replay several logs in parallel, one leased pool agent per log
+
+    Returns every visit result and combined stats.
+    """
+    def replay_one(path):
+        with pool.lease() as agent:
+            return ReplayEngine(agent, speed, score_elements).replay(iter_log_actions(path), log=path)
+
+    start = time.perf_counter()
+    results = []
+    counts = {'replayed': 0, 'skipped': 0, 'failed': 0}
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        for visits, stats in executor.map(replay_one, paths):
+            results.extend(visits)
+            for key in counts:
+                counts[key] += stats[key]
+    seconds = time.perf_counter() - start
+    total = sum(counts.values())
+    return results, dict(counts, logs=len(paths), actions=total, seconds=seconds,
+                         actions_per_second=total / seconds if seconds else 0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded action logs')
+    parser.add_argument('logs', nargs='+',
+                        help='actions_*.jsonl[.gz] logs, legacy actions_*.json logs or training_data_*.json files')
+    parser.add_argument('--mode', choices=['features', 'browser'], default='features',
+                        help='features: rebuild feature rows without a browser; browser: re-drive WebAgent')
+    parser.add_argument('--workers', type=int, help='Worker processes or browsers (default: CPU count)')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Browser mode playback speed; 0 skips the recorded waits')
+    parser.add_argument('--output', type=str,
+                        help='features.npz (features mode) or results JSON Lines (browser mode)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.mode == 'features':
+        X, visits, stats = replay_features(args.logs, workers=args.workers)
+        if args.output:
+            np.savez(args.output, features=X, visits=json.dumps(visits))
+    else:
+        from agent_pool import WebAgentPool
+
+        with WebAgentPool(size=args.workers) as pool:
+            visits, stats = replay_logs(args.logs, pool, speed=args.speed or None)
+        if args.output:
+            with open(args.output, 'w') as f:
+                for visit in visits:
+                    f.write(json.dumps(visit, default=str) + '\n')
+        changed = [visit for visit in visits if visit.get('recorded_ads') != visit.get('replayed_ads')]
+        print(f"Ad counts changed on {len(changed)} of {len(visits)} visits")
+    print(f"Replayed {stats['actions']} actions from {len(args.logs)} logs in {stats['seconds']:.2f}s "
+          f"({stats['actions_per_second']:,.0f} actions/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+def hash_ad_data(ad_data):
+    """Stable content hash of detect_ad_content output"""
+    payload = json.dumps(ad_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """LRU cache of per-URL ad detections and predictions with a TTL
+
+    A fresh entry is returned without loading the page. Once the TTL has
+    passed, the caller reloads the page and detects ads again; if the
+    content hash is unchanged the cached prediction is reused, otherwise
+    the entry is replaced. A revalidation does not reset the entry's age,
+    so every reuse after the TTL is checked against the page. Entries
+    also record the version of the model that made them (see
+    AdRatingModel.version) and are misses for any other version.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.counters = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def get(self, url, model_version=None):
+        """Return the cached result for url if it is younger than the TTL and from model_version"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if (entry and entry.get('model_version') == model_version
+                    and time.time() - entry['stored_at'] < self.ttl):
+                self.entries.move_to_end(url)
+                self.counters['hits'] += 1
+                return entry['result']
+            return None
+
+    def get_by_content(self, url, content_hash, model_version=None):
+        """Return the cached result for url if its ad content and model_version are unchanged"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry and entry['content_hash'] == content_hash and entry.get('model_version') == model_version:
+                self.entries.move_to_end(url)
+                self.counters['revalidated'] += 1
+                return entry['result']
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, url, content_hash, result, model_version=None):
+        """Store a result, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self.entries[url] = {'content_hash': content_hash, 'result': result, 'stored_at': time.time(),
+                                 'model_version': model_version}
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def stats(self):
+        """Hit/miss counters plus current size"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['revalidated'] + self.counters['misses']
+            return dict(
+                self.counters,
+                entries=len(self.entries),
+                max_entries=self.max_entries,
+                ttl=self.ttl,
+                hit_rate=(self.counters['hits'] + self.counters['revalidated']) / lookups if lookups else 0.0
+            )
+
+    def save(self):
+        """Persist entries to path as JSON"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = [[url, entry] for url, entry in self.entries.items()]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'entries': entries}, f, default=str)
+        os.replace(temporary, self.path)
+        logging.info(f"Saved {len(entries)} cached predictions to {self.path}")
+
+    def load(self):
+        """Load persisted entries from path, keeping the most recent max_entries"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load result cache {self.path}: {str(e)}")
+            return
+        with self._lock:
+            self.entries = OrderedDict((url, entry) for url, entry in data.get('entries', []))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,154 @@
+import cv2
+import numpy as np
+
+# Templates smaller than this at a pyramid level are matched at a finer level
+MIN_TEMPLATE_SIZE = 8
+
+# Coarse candidates may score this much below the threshold before refinement
+COARSE_MARGIN = 0.2
+
+def to_gray(image, color_order='RGB'):
+    """Convert an RGB(A)/BGR(A) image to single-channel uint8 grayscale"""
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        code = cv2.COLOR_RGBA2GRAY if color_order == 'RGB' else cv2.COLOR_BGRA2GRAY
+    else:
+        code = cv2.COLOR_RGB2GRAY if color_order == 'RGB' else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(image, code)
+
+def build_pyramid(image, levels):
+    """Return [image, image/2, image/4, ...] with up to levels downscaled copies"""
+    pyramid = [image]
+    for _ in range(levels):
+        if min(pyramid[-1].shape[:2]) < 2 * MIN_TEMPLATE_SIZE:
+            break
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+def local_peaks(scores, threshold, max_peaks):
+    """Return (ys, xs, values) of 3x3 local maxima at or above threshold, best first"""
+    peaks = (scores >= threshold) & (scores == cv2.dilate(scores, np.ones((3, 3), np.uint8)))
+    ys, xs = np.nonzero(peaks)
+    values = scores[ys, xs]
+    order = np.argsort(-values)[:max_peaks]
+    return ys[order], xs[order], values[order]
+
+def non_max_suppression(hits, iou_threshold=0.3):
+    """Greedily keep the best-scoring hits, dropping boxes that overlap a kept one"""
+    kept = []
+    for hit in sorted(hits, key=lambda h: h['score'], reverse=True):
+        if all(box_iou(hit, other) <= iou_threshold for other in kept):
+            kept.append(hit)
+    return kept
+
+def box_iou(a, b):
+    """Intersection over union of two hit boxes"""
+    width = min(a['x'] + a['width'], b['x'] + b['width']) - max(a['x'], b['x'])
+    height = min(a['y'] + a['height'], b['y'] + b['height']) - max(a['y'], b['y'])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    return intersection / (a['width'] * a['height'] + b['width'] * b['height'] - intersection)
+
+class TemplateRegistry:
+    """Templates loaded and preprocessed once, matched together against a screenshot
+
+    Each template is stored in grayscale at every requested scale, with a
+    pyramid of downscaled copies for coarse-to-fine search.
+    """
+
+    def __init__(self, scales=(1.0,), pyramid_levels=2):
+        self.scales = tuple(scales)
+        self.pyramid_levels = pyramid_levels
+        self.templates = {}
+
+    def register(self, name, template):
+        """Register a template from an image path or a BGR array"""
+        if isinstance(template, str):
+            image = cv2.imread(template)
+            if image is None:
+                raise ValueError(f"Could not read template image: {template}")
+        else:
+            image = template
+        gray = to_gray(image, color_order='BGR')
+
+        variants = []
+        for scale in self.scales:
+            scaled = gray if scale == 1.0 else cv2.resize(
+                gray, None, fx=scale, fy=scale,
+                interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+            if min(scaled.shape) < 1:
+                continue
+            variants.append({'scale': scale, 'pyramid': build_pyramid(scaled, self.pyramid_levels)})
+        self.templates[name] = variants
+        return name
+
+    def ensure(self, template_path):
+        """Register a template path on first use and return its name"""
+        if template_path not in self.templates:
+            self.register(template_path, template_path)
+        return template_path
+
+    def match(self, screenshot, threshold=0.8, names=None, coarse_level=None,
+              max_candidates=50, iou_threshold=0.3):
+        """Match registered templates against one RGB screenshot
+
+        The screenshot is converted to grayscale and its pyramid built once
+        for all templates. Each template is searched at the coarsest usable
+        pyramid level (coarse_level, default pyramid_levels) and candidates
+        are refined at full resolution. Returns every hit above threshold
+        after per-template non-maximum suppression, best first.
+        """
+        gray = to_gray(screenshot)
+        if coarse_level is None:
+            coarse_level = self.pyramid_levels
+        screen_pyramid = build_pyramid(gray, coarse_level)
+
+        hits = []
+        for name in (names or list(self.templates)):
+            template_hits = []
+            for variant in self.templates[name]:
+                template_hits.extend(self._match_variant(
+                    name, variant, screen_pyramid, threshold, coarse_level, max_candidates))
+            hits.extend(non_max_suppression(template_hits, iou_threshold))
+        return sorted(hits, key=lambda h: h['score'], reverse=True)
+
+    def _match_variant(self, name, variant, screen_pyramid, threshold, coarse_level, max_candidates):
+        """Coarse-to-fine search for one scaled template"""
+        template_pyramid = variant['pyramid']
+        full_template = template_pyramid[0]
+        height, width = full_template.shape
+        full_screen = screen_pyramid[0]
+        if height > full_screen.shape[0] or width > full_screen.shape[1]:
+            return []
+
+        level = min(coarse_level, len(template_pyramid) - 1, len(screen_pyramid) - 1)
+        while level > 0 and min(template_pyramid[level].shape) < MIN_TEMPLATE_SIZE:
+            level -= 1
+
+        def hit(x, y, score):
+            return {'name': name, 'x': int(x), 'y': int(y), 'width': width, 'height': height,
+                    'score': float(score), 'scale': variant['scale']}
+
+        if level == 0:
+            scores = cv2.matchTemplate(full_screen, full_template, cv2.TM_CCOEFF_NORMED)
+            ys, xs, values = local_peaks(scores, threshold, max_candidates)
+            return [hit(x, y, value) for y, x, value in zip(ys, xs, values)]
+
+        coarse = cv2.matchTemplate(screen_pyramid[level], template_pyramid[level], cv2.TM_CCOEFF_NORMED)
+        ys, xs, _ = local_peaks(coarse, threshold - COARSE_MARGIN, max_candidates)
+
+        # Refine each coarse candidate in a small full-resolution window
+        factor = 2 ** level
+        results = []
+        for y, x in zip(ys * factor, xs * factor):
+            x0, y0 = max(x - factor, 0), max(y - factor, 0)
+            window = full_screen[y0:y + height + factor, x0:x + width + factor]
+            if window.shape[0] < height or window.shape[1] < width:
+                continue
+            scores = cv2.matchTemplate(window, full_template, cv2.TM_CCOEFF_NORMED)
+            _, value, _, location = cv2.minMaxLoc(scores)
+            if value >= threshold:
+                results.append(hit(x0 + location[0], y0 + location[1], value))
+        return results
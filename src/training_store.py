@@ -0,0 +1,180 @@
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+import numpy as np
+from ml_model import ACTION_CODES, PARAM_COLUMNS, parse_timestamps, stack_sequence_columns
+
+# Action code for types outside ACTION_CODES
+UNKNOWN_ACTION = 255
+
+SHARD_ARRAYS = ['codes', 'timestamps', 'params', 'offsets', 'ratings']
+
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
+def encode_sequences(action_sequences):
+    """Encode recorded action dicts into typed column arrays
+
+    Navigation URLs are not kept; the action logs still hold them.
+    ActionBuffer-backed sequences are copied column by column.
+    """
+    columns = stack_sequence_columns(action_sequences)
+    if columns is not None:
+        return columns
+
+    lengths = [len(sequence) for sequence in action_sequences]
+    offsets = np.zeros(len(action_sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    n_actions = int(offsets[-1])
+
+    codes = np.full(n_actions, UNKNOWN_ACTION, dtype=np.uint8)
+    params = np.zeros((n_actions, len(PARAM_COLUMNS)), dtype=np.float64)
+    timestamps = []
+    row = 0
+    for sequence in action_sequences:
+        for action in sequence:
+            codes[row] = ACTION_CODES.get(action['type'], UNKNOWN_ACTION)
+            action_params = action.get('params') or {}
+            for i, name in enumerate(PARAM_COLUMNS):
+                value = action_params.get(name)
+                if isinstance(value, (int, float)):
+                    params[row, i] = value
+            if action_params.get('direction') == 'up':
+                params[row, 0] = -abs(params[row, 0])
+            timestamps.append(str(action['timestamp']))
+            row += 1
+
+    return {
+        'codes': codes,
+        'timestamps': parse_timestamps(timestamps).astype(np.float64),
+        'params': narrow_params(params),
+        'offsets': offsets
+    }
+
+def narrow_params(params):
+    """Store params as int32 when that is lossless, else keep float64
+
+    Fractional values or values outside the int32 range would otherwise be
+    truncated or wrap, changing the features built from the store.
+    """
+    if (np.isfinite(params).all() and (params == np.round(params)).all()
+            and (params >= INT32_MIN).all() and (params <= INT32_MAX).all()):
+        return params.astype(np.int32)
+    return params
+
+class TrainingStore:
+    """Directory of append-only .npy shards holding encoded training sequences
+
+    Each shard holds one appended batch: per-action codes (uint8),
+    timestamps (float64 epoch seconds) and params (PARAM_COLUMNS; int32,
+    or float64 for shards holding non-integer values),
+    plus per-sequence offsets and ratings. Shards are memory-mapped on
+    load, so features are built without materializing action dicts.
+    """
+
+    def __init__(self, path='training_data'):
+        self.path = path
+
+    def shard_paths(self):
+        """Return complete shard directories in append order"""
+        if not os.path.isdir(self.path):
+            return []
+        names = sorted(name for name in os.listdir(self.path) if name.startswith('shard_'))
+        return [os.path.join(self.path, name) for name in names
+                if os.path.exists(os.path.join(self.path, name, 'ratings.npy'))]
+
+    def append(self, action_sequences, ratings):
+        """Write sequences and their ratings as a new shard"""
+        if len(action_sequences) != len(ratings):
+            raise ValueError("Every sequence needs exactly one rating")
+        if not action_sequences:
+            return None
+
+        return self.append_columns(encode_sequences(action_sequences), ratings)
+
+    def append_columns(self, columns, ratings):
+        """Write already encoded columns (see encode_sequences) and ratings as a new shard"""
+        columns = dict(columns, ratings=np.asarray(ratings, dtype=np.float32))
+        if len(columns['offsets']) - 1 != len(columns['ratings']):
+            raise ValueError("Every sequence needs exactly one rating")
+
+        os.makedirs(self.path, exist_ok=True)
+        name = f'shard_{datetime.now().strftime("%Y%m%d_%H%M%S_%f")}'
+        staging = os.path.join(self.path, f'.{name}')
+        os.makedirs(staging)
+        for key in SHARD_ARRAYS:
+            np.save(os.path.join(staging, f'{key}.npy'), columns[key])
+        # Rename last so readers never see a partially written shard
+        shard = os.path.join(self.path, name)
+        os.rename(staging, shard)
+        logging.info(f"Appended {len(ratings)} sequences to training store shard {shard}")
+        return shard
+
+    def load_shard(self, shard, mmap=True):
+        """Load one shard's arrays, memory-mapped by default"""
+        mode = 'r' if mmap else None
+        return {key: np.load(os.path.join(shard, f'{key}.npy'), mmap_mode=mode) for key in SHARD_ARRAYS}
+
+    def iter_shards(self, mmap=True):
+        """Yield the arrays of every shard"""
+        for shard in self.shard_paths():
+            yield self.load_shard(shard, mmap)
+
+    def chunk_ranges(self, chunk_size):
+        """Split the store into (shard, start, stop) ranges of at most chunk_size sequences"""
+        ranges = []
+        for shard in self.shard_paths():
+            count = len(np.load(os.path.join(shard, 'ratings.npy'), mmap_mode='r'))
+            for start in range(0, count, chunk_size):
+                ranges.append((shard, start, min(start + chunk_size, count)))
+        return ranges
+
+    def load_feature_chunk(self, model, shard, start, stop):
+        """Build features and ratings for sequences start:stop of one shard"""
+        columns = self.load_shard(shard)
+        offsets = np.asarray(columns['offsets'][start:stop + 1])
+        first, last = offsets[0], offsets[-1]
+        X = model.extract_features_columns(
+            columns['codes'][first:last], columns['timestamps'][first:last],
+            columns['params'][first:last], offsets - first)
+        return X, np.asarray(columns['ratings'][start:stop])
+
+    def load_features(self, model):
+        """Build the feature matrix and ratings for every stored sequence"""
+        features = []
+        ratings = []
+        for columns in self.iter_shards():
+            features.append(model.extract_features_columns(
+                columns['codes'], columns['timestamps'], columns['params'], columns['offsets']))
+            ratings.append(np.asarray(columns['ratings']))
+        if not features:
+            return np.zeros((0, len(model.feature_names))), np.zeros(0, dtype=np.float32)
+        return np.vstack(features), np.concatenate(ratings)
+
+    def __len__(self):
+        return sum(len(np.load(os.path.join(shard, 'ratings.npy'), mmap_mode='r'))
+                   for shard in self.shard_paths())
+
+def convert_json_training_data(filenames, store_path):
+    """Append TrainingSession JSON files to a columnar store, one shard per file"""
+    store = TrainingStore(store_path)
+    for filename in filenames:
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        store.append(data['sequences'], data['ratings'])
+        print(f"Converted {filename}: {len(data['ratings'])} sequences")
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert JSON training data to the columnar store')
+    parser.add_argument('files', nargs='+', help='training_data_*.json files to convert')
+    parser.add_argument('--store', type=str, default='training_data', help='Store directory')
+    args = parser.parse_args()
+
+    store = convert_json_training_data(args.files, args.store)
+    print(f"Store {args.store} now holds {len(store)} sequences")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from metrics import timed
+from ml_model import AdRatingModel, DEFAULT_HYPERPARAMETERS, TrainingSession
+
+# Values tried for each AdRatingModel hyperparameter
+DEFAULT_SPACE = {
+    'layers': [(64, 32, 16), (128, 64, 32), (32, 16)],
+    'dropout': [0.0, 0.2, 0.4],
+    'learning_rate': [0.001, 0.003],
+    'epochs': [50],
+    'batch_size': [32, 64]
+}
+
+# Set in each worker process by _init_worker
+_worker = {}
+
+def candidates(space, iterations=None, seed=0):
+    """Hyperparameter settings to try: the full grid, or a random sample of it
+
+    Keys missing from space keep their DEFAULT_HYPERPARAMETERS value.
+    """
+    keys = list(space)
+    grid = [dict(DEFAULT_HYPERPARAMETERS, **dict(zip(keys, values)))
+            for values in itertools.product(*(space[key] for key in keys))]
+    if iterations is not None and iterations < len(grid):
+        grid = random.Random(seed).sample(grid, iterations)
+    return grid
+
+def kfold_indices(n_samples, folds, seed=0):
+    """Shuffled (train, validation) index arrays for k-fold cross-validation"""
+    order = np.random.default_rng(seed).permutation(n_samples)
+    splits = np.array_split(order, folds)
+    return [(np.concatenate(splits[:i] + splits[i + 1:]), split) for i, split in enumerate(splits)]
+
+def _init_worker(X, y, splits, threads, seed):
+    """Limit TensorFlow to threads CPU threads and keep the data for every task"""
+    # Set before TensorFlow is imported so its thread pools are sized from the start
+    for name in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _worker.update(X=X, y=y, splits=splits, seed=seed)
+
+def _evaluate(task):
+    """Train one candidate on one fold and return its validation loss and accuracy"""
+    import tensorflow as tf
+
+    index, params, fold = task
+    train, validation = _worker['splits'][fold]
+    X, y = _worker['X'], _worker['y']
+    # Same initial weights for every candidate on a fold
+    tf.keras.utils.set_random_seed(_worker['seed'] + fold)
+    model = AdRatingModel(params)
+    history = model.fit_features(X[train], y[train], validation_data=(X[validation], y[validation]), verbose=0)
+    return index, fold, history.history['val_loss'][-1], history.history['val_accuracy'][-1]
+
+@timed('tuning.tune')
+def tune(X, y, space=None, folds=5, iterations=None, workers=None, path='models', seed=0):
+    """Cross-validate hyperparameter settings in a process pool and save the best model
+
+    Every (setting, fold) pair is one task. Workers split the CPU cores
+    between them, so TensorFlow in each runs with cpu_count // workers
+    threads. The setting with the lowest mean validation loss is refit
+    on all of X and saved with AdRatingModel.save. Returns the best
+    setting, per-setting scores (best first) and the refit model.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float32)
+    settings = candidates(space or DEFAULT_SPACE, iterations, seed)
+    splits = kfold_indices(len(y), folds, seed)
+    tasks = [(index, params, fold) for index, params in enumerate(settings) for fold in range(folds)]
+
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(tasks))
+    threads = max(1, cores // workers)
+    logging.info(f"Tuning {len(settings)} settings x {folds} folds on {workers} workers "
+                 f"with {threads} threads each")
+
+    losses = np.zeros((len(settings), folds))
+    accuracies = np.zeros((len(settings), folds))
+    # TensorFlow is not fork-safe, so workers start from a fresh interpreter
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(X, y, splits, threads, seed)) as executor:
+        for index, fold, loss, accuracy in executor.map(_evaluate, tasks):
+            losses[index, fold] = loss
+            accuracies[index, fold] = accuracy
+
+    results = [{
+        'params': params,
+        'val_loss': float(losses[index].mean()),
+        'val_accuracy': float(accuracies[index].mean()),
+        'fold_losses': losses[index].tolist()
+    } for index, params in enumerate(settings)]
+    results.sort(key=lambda result: result['val_loss'])
+    best = results[0]['params']
+    logging.info(f"Best setting {best}: val_loss {results[0]['val_loss']:.4f}")
+
+    model = AdRatingModel(best)
+    model.fit_features(X, y, verbose=0)
+    model.save(path, export_lite=True)
+    return {'best': best, 'results': results, 'model': model}
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated hyperparameter search for AdRatingModel')
+    parser.add_argument('data', help='Training store directory or legacy JSON training file')
+    parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds')
+    parser.add_argument('--iterations', type=int, help='Random settings to try instead of the full grid')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', type=str, default='models', help='Directory for the best model')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = TrainingSession()
+    session.load_training_data(args.data)
+    result = session.tune_model(folds=args.folds, iterations=args.iterations,
+                                workers=args.workers, path=args.output)
+    if result is None:
+        print(f"Need at least {args.folds} rated sequences to tune")
+        return
+
+    print(f"{'val_loss':>9} {'val_acc':>8}  setting")
+    for entry in result['results']:
+        print(f"{entry['val_loss']:>9.4f} {entry['val_accuracy']:>8.3f}  {entry['params']}")
+    print(f"Best model saved to {args.output}")
+
+if __name__ == "__main__":
+    main()